@@ -1,15 +1,37 @@
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk
 
+from search_index import NameSearchIndex
+
+AUTOCOMPLETE_LIMIT = 100
+DEBOUNCE_MS = 150
+POLL_MS = 20
+
+# one search thread for all entries: searches run one at a time, off the
+# Tk thread, and queued stale ones can still be cancelled
+_search_executor = ThreadPoolExecutor(max_workers=1)
+
 
 class AutocompleteEntry(ttk.Entry):
-    def __init__(self, autocomplete_list, disable_autocomplete=False, *args, **kwargs):
+    def __init__(
+        self,
+        autocomplete_list,
+        disable_autocomplete=False,
+        fuzzy=False,
+        *args,
+        **kwargs,
+    ):
         self.var = tk.StringVar()
         kwargs["textvariable"] = self.var
         kwargs["width"] = 50
         super().__init__(*args, **kwargs)
         self.autocomplete_list = autocomplete_list
+        self.search_index = None
         self.disable_autocomplete = disable_autocomplete
+        self.fuzzy = fuzzy
+        self._debounce_id = None
+        self._search = None
         self._initialize_autocomplete()
 
     def _initialize_autocomplete(self):
@@ -22,8 +44,27 @@ class AutocompleteEntry(ttk.Entry):
     def update_list(self, *args):
         if not self.toplevel:
             self._create_listbox()
-        search_text = self.var.get()
-        self._filter_listbox(search_text)
+        # restart the quiet period on every keystroke
+        if self._debounce_id is not None:
+            self.after_cancel(self._debounce_id)
+        self._debounce_id = self.after(DEBOUNCE_MS, self._start_search)
+
+    def _start_search(self):
+        self._debounce_id = None
+        if self._search is not None:
+            self._search.cancel()
+        self._search = _search_executor.submit(self._filter, self.var.get())
+        self.after(POLL_MS, self._poll_search, self._search)
+
+    def _poll_search(self, search):
+        if search is not self._search or search.cancelled():
+            return
+        if not search.done():
+            self.after(POLL_MS, self._poll_search, search)
+            return
+        self._search = None
+        if self.listbox:
+            self._fill_listbox(search.result())
 
     def _create_listbox(self):
         self.toplevel = tk.Toplevel(self)
@@ -36,15 +77,23 @@ class AutocompleteEntry(ttk.Entry):
         self.listbox.pack(fill=tk.BOTH, expand=True)
         self.listbox.bind("<Double-1>", self.selection)
 
-    def _filter_listbox(self, search_text):
+    def _get_search_index(self):
+        # autocomplete_list is either a list of names or a callable that
+        # returns a (shared) NameSearchIndex
+        if callable(self.autocomplete_list):
+            return self.autocomplete_list()
+        if self.search_index is None:
+            self.search_index = NameSearchIndex(self.autocomplete_list)
+        return self.search_index
+
+    def _filter(self, search_text):
+        return self._get_search_index().search(
+            search_text, limit=AUTOCOMPLETE_LIMIT, fuzzy=self.fuzzy
+        )
+
+    def _fill_listbox(self, filtered_autocomplete_list):
         self.listbox.delete(0, tk.END)
-        filtered_autocomplete_list = [
-            item
-            for item in self.autocomplete_list
-            if search_text.lower() in item.lower()
-        ]
-        for item in filtered_autocomplete_list:
-            self.listbox.insert(tk.END, item)
+        self.listbox.insert(tk.END, *filtered_autocomplete_list)
 
     def selection(self, event):
         if self.listbox:
@@ -52,11 +101,24 @@ class AutocompleteEntry(ttk.Entry):
             self._destroy_listbox()
             self.config(state="disabled")
 
+    def _cancel_search(self):
+        if self._debounce_id is not None:
+            self.after_cancel(self._debounce_id)
+            self._debounce_id = None
+        if self._search is not None:
+            self._search.cancel()
+            self._search = None
+
     def _destroy_listbox(self):
+        self._cancel_search()
         self.toplevel.destroy()
         self.toplevel = None
         self.listbox = None
 
+    def destroy(self):
+        self._cancel_search()
+        super().destroy()
+
     def select_all(self, event):
         self.selection_range(0, tk.END)
         return "break"
@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from food_matrix import NUTRIENT_KEYS, FoodMatrix, open_food_database
+from nutrient_optimizer import DietModel
+from nutrient_ranges import calculate_nutrient_ranges
+
+SHARED_ARRAYS = [
+    "values",
+    "prices",
+    "max_weights",
+    "weights",
+    "category_codes",
+    "item_prices",
+]
+
+_worker_memory = []
+_worker_model = None
+
+
+def share_food_matrix(food):
+    handles = []
+    arrays = {}
+    for attribute in SHARED_ARRAYS:
+        array = getattr(food, attribute)
+        handle = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=handle.buf)
+        shared[...] = array
+        handles.append(handle)
+        arrays[attribute] = (handle.name, array.shape, array.dtype.str)
+    spec = {
+        "names": food.names,
+        "nutrients": food.nutrients,
+        "categories": food.categories,
+        "arrays": arrays,
+    }
+    return handles, spec
+
+
+def attach_food_matrix(spec, handles):
+    arrays = {}
+    for attribute, (name, shape, dtype) in spec["arrays"].items():
+        handle = shared_memory.SharedMemory(name=name)
+        handles.append(handle)
+        arrays[attribute] = np.ndarray(shape, dtype=dtype, buffer=handle.buf)
+    return FoodMatrix(
+        spec["names"],
+        spec["nutrients"],
+        arrays["values"],
+        arrays["prices"],
+        arrays["max_weights"],
+        arrays["weights"],
+        arrays["category_codes"],
+        spec["categories"],
+        item_prices=arrays["item_prices"],
+    )
+
+
+def _init_worker(spec):
+    global _worker_model
+    _worker_model = DietModel(attach_food_matrix(spec, _worker_memory))
+
+
+def profile_nutrient_ranges(profile):
+    return calculate_nutrient_ranges(
+        gender=profile["gender"],
+        height=profile["height"],
+        weight_cur=profile["weight"],
+        age=profile["age"],
+        activity_multiplier=profile["activity_multiplier"],
+        breastfeeding=profile.get("breastfeeding", False),
+    )
+
+
+def solve_profile(profile, model=None):
+    model = model or _worker_model
+    start = time.perf_counter()
+    nutrient_ranges = profile_nutrient_ranges(profile)
+    ranges_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    optimal_diet = model.solve(nutrient_ranges)
+    solve_time = time.perf_counter() - start
+
+    if optimal_diet == "not success":
+        diet = None
+        cost = None
+    else:
+        diet = {name: float(weight) for name, weight in optimal_diet.items()}
+        cost = sum(
+            float(model.food.prices[model.food.index[name]]) * weight / 100
+            for name, weight in diet.items()
+        )
+
+    return {
+        "profile": profile,
+        "success": diet is not None,
+        "diet": diet,
+        "cost": cost,
+        "timings": {"ranges": ranges_time, "solve": solve_time},
+    }
+
+
+def read_profiles(file_path):
+    with open(file_path, encoding="utf-8") as profiles_file:
+        for line in profiles_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def solve_profiles(food, profiles, max_workers=None):
+    handles, spec = share_food_matrix(food)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(spec,)
+        ) as executor:
+            futures = [executor.submit(solve_profile, profile) for profile in profiles]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        for handle in handles:
+            handle.close()
+            handle.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve the optimal diet for every profile of a JSONL file"
+    )
+    parser.add_argument("profiles", help="JSONL file, one profile per line")
+    parser.add_argument(
+        "--data", default="D:/YandexDisk/food/code/opt_data.json", help="food data"
+    )
+    parser.add_argument("--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    food = open_food_database(args.data)
+    food = food.subset(food.select(NUTRIENT_KEYS, has_price=True))
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for result in solve_profiles(
+            food, read_profiles(args.profiles), max_workers=args.workers
+        ):
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
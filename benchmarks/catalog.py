@@ -0,0 +1,88 @@
+import numpy as np
+
+from food_matrix import NUTRIENT_KEYS
+from nutrient_ranges import calculate_nutrient_ranges
+
+REFERENCE_PROFILE = {
+    "gender": "female",
+    "height": 1.7,
+    "weight_cur": 64,
+    "age": 32,
+    "activity_multiplier": 1.375,
+    "breastfeeding": True,
+}
+
+CATEGORIES = [
+    "Овощи, фрукты, ягоды, зелень",
+    "Молочные продукты",
+    "Крупы, макароны",
+    "Мясо, птица",
+    "Рыба",
+    "Орехи, сухофрукты",
+]
+
+
+def synthetic_food_database(n_products, seed=0, n_variants=1):
+    # n_variants > 1 adds near-duplicate SKUs (nutrients within ~1%,
+    # different prices) of every base product, like several kefirs
+    rng = np.random.default_rng(seed)
+    nutrient_ranges = calculate_nutrient_ranges(**REFERENCE_PROFILE)
+
+    data = {}
+    for i in range(n_products // n_variants):
+        energy = rng.uniform(20, 600)
+        nutrients_in_100g = {}
+        for nutrient in NUTRIENT_KEYS:
+            if nutrient == "Energ_Kcal":
+                amount = energy
+            elif nutrient in nutrient_ranges:
+                # ~1/10 of the daily optimum per 100 g, with a long right tail
+                amount = nutrient_ranges[nutrient][2] / 10 * rng.lognormal(-0.5, 1)
+                amount *= rng.random() > 0.2
+            else:
+                amount = rng.uniform(0, 50)
+            nutrients_in_100g[nutrient] = round(float(amount), 3)
+        category = CATEGORIES[rng.integers(len(CATEGORIES))]
+        nutrients_in_100g["vegetables_fruits"] = 100 if category == CATEGORIES[0] else 0
+        price_100g = float(rng.uniform(10, 200))
+
+        for variant in range(n_variants):
+            weight = int(rng.choice([100, 200, 300, 500, 1000]))
+            variant_nutrients = nutrients_in_100g
+            variant_price = price_100g
+            name = f"Продукт {i}, {weight} г"
+            if n_variants > 1:
+                variant_nutrients = {
+                    nutrient: round(amount * rng.normal(1, 0.01), 3)
+                    for nutrient, amount in nutrients_in_100g.items()
+                }
+                variant_nutrients["vegetables_fruits"] = nutrients_in_100g[
+                    "vegetables_fruits"
+                ]
+                variant_price = price_100g * rng.uniform(0.8, 1.5)
+                name = f"Продукт {i}.{variant}, {weight} г"
+            variant_price = round(variant_price, 2)
+            # every other base product is sold by the piece, the rest by kg
+            if i % 2:
+                price = {
+                    "value": variant_price * 10,
+                    "unit": "руб/кг",
+                    "kg": variant_price * 10,
+                    "100g": variant_price,
+                }
+            else:
+                item_price = round(variant_price * weight / 100, 2)
+                price = {
+                    "value": item_price,
+                    "unit": "руб/шт",
+                    "item": item_price,
+                    "100g": variant_price,
+                }
+            data[name] = {
+                "category": category,
+                "weight": weight,
+                "price": price,
+                "max_weight": int(rng.choice([200, 300, 500, 1000])),
+                "nutrients_in_100g": variant_nutrients,
+            }
+    return data
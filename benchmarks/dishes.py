@@ -0,0 +1,62 @@
+import random
+import time
+
+from benchmarks.catalog import synthetic_food_database
+from data import compute_data_dict
+from dishes import compute_dishes
+from food_matrix import FoodMatrix
+
+N_PRODUCTS = 3000
+N_DISHES = 10_000
+
+
+def synthetic_dishes(product_names, n_dishes, seed=0):
+    rng = random.Random(seed)
+    return {
+        f"Блюдо {i}": {
+            name: rng.choice([10, 25, 50, 100, 150, 200])
+            for name in rng.sample(product_names, rng.randint(2, 15))
+        }
+        for i in range(n_dishes)
+    }
+
+
+def same_dishes(expected, actual):
+    # nutrient keys may come in a different order, values must be equal
+    return expected.keys() == actual.keys() and all(
+        dish["price"] == actual[name]["price"]
+        and dish["weight"] == actual[name]["weight"]
+        and all(
+            sorted(dish[section].items()) == sorted(actual[name][section].items())
+            for section in ("nutrients_in_100g", "nutrients_total")
+        )
+        for name, dish in expected.items()
+    )
+
+
+def main():
+    data = synthetic_food_database(N_PRODUCTS)
+    compounds = synthetic_dishes(list(data), N_DISHES)
+
+    start = time.perf_counter()
+    expected = compute_data_dict(compounds, data)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = compute_dishes(compounds, data)
+    batched_time = time.perf_counter() - start
+
+    food = FoodMatrix.from_dict(data)
+    start = time.perf_counter()
+    compute_dishes(compounds, food)
+    matrix_time = time.perf_counter() - start
+
+    print(f"dishes: {N_DISHES}, products: {N_PRODUCTS}")
+    print(f"compute_data_dict:           {loop_time:.3f} s")
+    print(f"compute_dishes (dict input): {batched_time:.3f} s")
+    print(f"compute_dishes (FoodMatrix): {matrix_time:.3f} s")
+    assert same_dishes(expected, actual)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.optimize import linprog
+
+from benchmarks.catalog import REFERENCE_PROFILE, synthetic_food_database
+from food_matrix import FoodMatrix
+from nutrient_optimizer import build_diet_lp
+from nutrient_ranges import calculate_nutrient_ranges
+
+CATALOG_SIZES = [500, 1000, 2000, 4000]
+
+
+def dense_diet_lp(filtered_data, nutrient_ranges):
+    # row-by-row assembly as it was done before build_diet_lp
+    product_nutrients = [
+        product["nutrients_in_100g"] for product in filtered_data.values()
+    ]
+    max_weights = [product["max_weight"] / 100 for product in filtered_data.values()]
+    n_products = len(product_nutrients)
+
+    A_eq = np.zeros((1, n_products))
+    A_eq[0, :] = [nutrients_dict["Energ_Kcal"] for nutrients_dict in product_nutrients]
+    b_eq = np.array([nutrient_ranges["Energ_Kcal"][2]])
+
+    A_ub = []
+    b_ub = []
+    for nutrient, values in nutrient_ranges.items():
+        if nutrient != "Energ_Kcal":
+            lower_bound_row = np.zeros(n_products)
+            upper_bound_row = np.zeros(n_products)
+            for i in range(n_products):
+                if nutrient in product_nutrients[i]:
+                    lower_bound_row[i] = -product_nutrients[i][nutrient]
+                    upper_bound_row[i] = product_nutrients[i][nutrient]
+            A_ub.append(lower_bound_row)
+            A_ub.append(upper_bound_row)
+            b_ub.append(-values[1])
+            b_ub.append(values[4])
+
+    for i in range(n_products):
+        weight_constraint_row = np.zeros(n_products)
+        weight_constraint_row[i] = 1
+        A_ub.append(weight_constraint_row)
+        b_ub.append(max_weights[i])
+
+    return {
+        "c": [product["price"]["100g"] for product in filtered_data.values()],
+        "A_ub": np.array(A_ub),
+        "b_ub": np.array(b_ub),
+        "A_eq": A_eq,
+        "b_eq": b_eq,
+    }
+
+
+def sparse_diet_lp(filtered_data, nutrient_ranges):
+    return build_diet_lp(FoodMatrix.from_dict(filtered_data), nutrient_ranges)
+
+
+def measure(builder, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    lp = builder(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return lp, elapsed, peak
+
+
+def main():
+    nutrient_ranges = calculate_nutrient_ranges(**REFERENCE_PROFILE)
+    print(
+        f"{'products':>8} | {'dense build':>11} {'peak':>9} {'solve':>8} | "
+        f"{'sparse build':>12} {'peak':>9} {'solve':>8}"
+    )
+    for n_products in CATALOG_SIZES:
+        filtered_data = synthetic_food_database(n_products)
+        row = [f"{n_products:>8}"]
+        objectives = []
+        for builder in (dense_diet_lp, sparse_diet_lp):
+            lp, elapsed, peak = measure(builder, filtered_data, nutrient_ranges)
+            start = time.perf_counter()
+            result = linprog(**lp, method="highs")
+            solve_time = time.perf_counter() - start
+            objectives.append(result.fun)
+            width = 11 if builder is dense_diet_lp else 12
+            row.append(
+                f"{elapsed * 1000:>{width - 3}.1f} ms {peak / 2**20:>6.1f} MB "
+                f"{solve_time:>6.2f} s"
+            )
+        assert np.isclose(objectives[0], objectives[1])
+        print(" | ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import random
+import re
+import time
+
+from matcher import NameMatcher
+from vkusvill_mapping import vkusvill_dict
+
+N_NAMES = 100_000
+
+filler_words = [
+    "вкусвилл",
+    "органический",
+    "свежий",
+    "домашний",
+    "фермерский",
+    "отборный",
+    "нарезка",
+    "упаковка",
+    "классический",
+    "натуральный",
+    "сырники",
+    "пельмени",
+    "котлеты",
+    "сок",
+    "напиток",
+    "хлебцы",
+]
+
+
+def linear_match(name):
+    name_lower = name.lower()
+    for engl, dict2 in vkusvill_dict.items():
+        required_fits = all(
+            re.search(word, name_lower) for word in dict2["required_words"]
+        )
+        optional_fits = any(
+            re.search(word, name_lower) for word in dict2["optional_words"]
+        )
+        if required_fits and (not dict2["optional_words"] or optional_fits):
+            return engl
+    return None
+
+
+def mapping_words():
+    words = []
+    for rule in vkusvill_dict.values():
+        for pattern in rule["required_words"]:
+            words.append(re.sub(r"\\b|\\", "", pattern))
+    return words
+
+
+def synthetic_catalog(n_names, seed=0):
+    rng = random.Random(seed)
+    words = mapping_words()
+    names = []
+    for _ in range(n_names):
+        n_mapped = rng.choice([0, 0, 1, 1, 2, 3])
+        parts = rng.sample(words, n_mapped) + rng.sample(filler_words, 3)
+        rng.shuffle(parts)
+        name = " ".join(parts)
+        names.append(name.capitalize() + f", {rng.randint(50, 1000)} г")
+    return names
+
+
+def main():
+    names = synthetic_catalog(N_NAMES)
+
+    start = time.perf_counter()
+    linear_results = [linear_match(name) for name in names]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = NameMatcher(vkusvill_dict)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed_results = [matcher.match(name) for name in names]
+    indexed_time = time.perf_counter() - start
+
+    assert indexed_results == linear_results
+    matched = sum(result is not None for result in linear_results)
+    print(f"names: {len(names)}, matched: {matched}, rules: {len(vkusvill_dict)}")
+    print(f"linear scan:   {linear_time:.3f} s")
+    print(f"index build:   {build_time * 1000:.2f} ms")
+    print(f"indexed match: {indexed_time:.3f} s")
+    print(f"speedup:       {linear_time / indexed_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import time
+
+import nutrient_optimizer
+from benchmarks.catalog import REFERENCE_PROFILE, synthetic_food_database
+from nutrient_optimizer import DietModel
+from nutrient_ranges import calculate_nutrient_ranges
+
+CATALOG_SIZES = [600, 4000]
+N_POINTS = 50
+
+
+def main():
+    nutrient_ranges = calculate_nutrient_ranges(**REFERENCE_PROFILE)
+    highspy = nutrient_optimizer.highspy
+    backends = [("linprog", None)]
+    if highspy is not None:
+        backends.append(("highspy", highspy))
+    print(
+        f"{'products':>8} {'backend':>8} | {'one LP':>7} {'frontier':>8} "
+        f"{'solved':>6} {'vertices':>8}"
+    )
+    for n_products in CATALOG_SIZES:
+        model = DietModel.from_dict(synthetic_food_database(n_products))
+        start = time.perf_counter()
+        model.solve_lp(nutrient_ranges)
+        lp_time = time.perf_counter() - start
+        for name, backend in backends:
+            nutrient_optimizer.highspy = backend
+            start = time.perf_counter()
+            frontier = model.pareto_frontier(nutrient_ranges, n_points=N_POINTS)
+            frontier_time = time.perf_counter() - start
+            vertices = len(frontier[["cost", "deviation"]].round(6).drop_duplicates())
+            print(
+                f"{n_products:>8} {name:>8} | {lp_time:>5.2f} s "
+                f"{frontier_time:>6.2f} s {int(frontier['solved'].sum()):>6} "
+                f"{vertices:>8}"
+            )
+    nutrient_optimizer.highspy = highspy
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import time
+from collections import Counter
+
+from benchmarks.catalog import REFERENCE_PROFILE, synthetic_food_database
+from nutrient_optimizer import DietModel
+from nutrient_ranges import calculate_nutrient_ranges
+from weekly_planner import build_weekly_lp, solve_weekly_plan
+
+N_PRODUCTS = 2000
+TIME_LIMIT = 60
+# (days, max_repeats, method)
+PLANS = [
+    (1, None, "repair"),
+    (7, None, "repair"),
+    (7, 3, "lp"),
+    (7, 3, "repair"),
+    (7, 3, "milp"),
+    (28, None, "repair"),
+    (28, 10, "lp"),
+    (28, 10, "repair"),
+]
+
+
+def main():
+    nutrient_ranges = calculate_nutrient_ranges(**REFERENCE_PROFILE)
+    model = DietModel.from_dict(synthetic_food_database(N_PRODUCTS))
+    print(f"products: {N_PRODUCTS}")
+    print(
+        f"{'days':>4} {'max_repeats':>11} {'method':>14} {'variables':>9} "
+        f"{'nnz':>8} {'build':>8} {'solve':>7} {'status':>10} {'cost':>9} "
+        f"{'bound':>9} {'products':>8} {'max_days':>8}"
+    )
+    for n_days, max_repeats, method in PLANS:
+        start = time.perf_counter()
+        lp = build_weekly_lp(model, nutrient_ranges, n_days, max_repeats=max_repeats)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        plan = solve_weekly_plan(
+            model,
+            nutrient_ranges,
+            n_days,
+            max_repeats=max_repeats,
+            method=method,
+            time_limit=TIME_LIMIT,
+        )
+        solve_time = time.perf_counter() - start
+        if plan["days"] is None:
+            cost, n_bought, max_days = "-", "-", "-"
+        else:
+            # the most days any single product is eaten on
+            days_used = Counter(name for day in plan["days"] for name in day)
+            cost = f"{plan['cost']:.2f}"
+            n_bought, max_days = len(plan["purchase"]), max(days_used.values())
+        bound = "-" if plan["lower_bound"] is None else f"{plan['lower_bound']:.2f}"
+
+        print(
+            f"{n_days:>4} {str(max_repeats):>11} {plan['method']:>14} "
+            f"{len(lp['c']):>9} {lp['A_ub'].nnz + lp['A_eq'].nnz:>8} "
+            f"{build_time * 1000:>5.1f} ms {solve_time:>5.2f} s "
+            f"{plan['status']:>10} {cost:>9} {bound:>9} {n_bought:>8} {max_days:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,151 @@
 import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+INDENT = 4
+COMPACT_SEPARATORS = (",", ":")
 
 
 def load_json(file_path):
+    if orjson is not None:
+        with open(file_path, "rb") as json_file:
+            content = json_file.read()
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # e.g. NaN written by the json module, which orjson rejects
+            return json.loads(content)
     with open(file_path, encoding="utf-8") as json_file:
         return json.load(json_file)
 
 
-def save_json(file_path, data):
+def save_json(file_path, data, compact=False):
+    if compact and orjson is not None:
+        with open(file_path, "wb") as outfile:
+            outfile.write(orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY))
+        return
     with open(file_path, "w", encoding="utf-8") as outfile:
-        json.dump(data, outfile, ensure_ascii=False, indent=4)
+        if compact:
+            json.dump(data, outfile, ensure_ascii=False, separators=COMPACT_SEPARATORS)
+        else:
+            json.dump(data, outfile, ensure_ascii=False, indent=INDENT)
+
+
+def iter_json(file_path, chunk_size=1 << 16):
+    # yields the (key, value) pairs of a top-level JSON object one by one
+    decoder = json.JSONDecoder()
+    with open(file_path, encoding="utf-8") as json_file:
+        buffer = ""
+        position = 0
+        eof = False
+
+        def fill():
+            nonlocal buffer, position, eof
+            chunk = json_file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
+        def next_char():
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position].isspace():
+                    position += 1
+                if position < len(buffer):
+                    return buffer[position]
+                if eof:
+                    raise ValueError(f"Unexpected end of JSON in {file_path}")
+                fill()
+
+        def decode():
+            nonlocal position
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                    # a value ending right at the buffer end may be a number
+                    # cut in half by the chunk boundary
+                    if end < len(buffer) or eof:
+                        position = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        def expect(char):
+            nonlocal position
+            if next_char() != char:
+                raise ValueError(f"Expected {char!r} in {file_path}")
+            position += 1
+
+        expect("{")
+        if next_char() == "}":
+            return
+        while True:
+            next_char()
+            key = decode()
+            expect(":")
+            next_char()
+            yield key, decode()
+            if next_char() == "}":
+                return
+            expect(",")
+
+
+class JsonObjectWriter:
+    # writes a top-level JSON object pair by pair, with the same layout as
+    # save_json; the file is replaced only once the object is complete
+    def __init__(self, file_path, compact=False):
+        self.file_path = file_path
+        self.compact = compact
+        self.use_orjson = compact and orjson is not None
+        self.tmp_path = file_path + ".tmp"
+        self.outfile = None
+        self.n_items = 0
+
+    def __enter__(self):
+        mode = "wb" if self.use_orjson else "w"
+        encoding = None if self.use_orjson else "utf-8"
+        self.outfile = open(self.tmp_path, mode, encoding=encoding)
+        self._write("{")
+        return self
+
+    def _write(self, text):
+        self.outfile.write(text.encode("utf-8") if self.use_orjson else text)
+
+    def write(self, key, value):
+        if self.use_orjson:
+            self._write("," if self.n_items else "")
+            self.outfile.write(orjson.dumps(key))
+            self._write(":")
+            self.outfile.write(orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY))
+        elif self.compact:
+            self._write("," if self.n_items else "")
+            self._write(json.dumps(key, ensure_ascii=False) + ":")
+            self._write(
+                json.dumps(value, ensure_ascii=False, separators=COMPACT_SEPARATORS)
+            )
+        else:
+            padding = " " * INDENT
+            self._write(",\n" if self.n_items else "\n")
+            self._write(padding + json.dumps(key, ensure_ascii=False) + ": ")
+            value_text = json.dumps(value, ensure_ascii=False, indent=INDENT)
+            self._write(value_text.replace("\n", "\n" + padding))
+        self.n_items += 1
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self._write("\n}" if self.n_items and not self.compact else "}")
+        self.outfile.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.file_path)
+        else:
+            os.remove(self.tmp_path)
+        return False
 
 
 def compute_data_dict(compounds, data):
@@ -0,0 +1,275 @@
+import numpy as np
+from scipy import sparse
+
+from food_matrix import FoodMatrix
+
+
+def dish_weight_matrix(compounds, food):
+    # CSR rows keep every dish's ingredients in composition order, so each
+    # dish is summed in the same order as compute_data_dict, whatever else
+    # is in the batch
+    indptr = [0]
+    columns = []
+    weights = []
+    for composition in compounds.values():
+        for item, weight in composition.items():
+            if item in food.index:
+                columns.append(food.index[item])
+                weights.append(weight)
+        indptr.append(len(columns))
+    return sparse.csr_matrix(
+        (
+            np.array(weights, dtype=float),
+            np.array(columns, dtype=np.int32),
+            np.array(indptr, dtype=np.int32),
+        ),
+        shape=(len(compounds), len(food)),
+    )
+
+
+def compute_dishes(compounds, data):
+    # batched compute_data_dict: one sparse (dish x product) @ (product x
+    # nutrient) product instead of per-ingredient loops, same output layout
+    if isinstance(data, FoodMatrix):
+        food = data
+    else:
+        items = dict.fromkeys(
+            item for composition in compounds.values() for item in composition
+        )
+        food = FoodMatrix.from_dict(
+            {item: data[item] for item in items if item in data}
+        )
+
+    portions = dish_weight_matrix(compounds, food)
+    rows_without_price = np.isnan(food.prices[portions.indices])
+    if rows_without_price.any():
+        product = food.names[portions.indices[np.argmax(rows_without_price)]]
+        raise ValueError(f"No price per 100 g for dish ingredient {product}")
+
+    # weight x (amount / 100), term by term as in compute_data_dict
+    present = ~np.isnan(food.values)
+    totals = (portions @ np.where(present, food.values / 100, 0)).tolist()
+    item_prices = (portions @ (food.prices / 100)).tolist()
+    pattern = sparse.csr_matrix(
+        (np.ones(portions.nnz, dtype=np.int32), portions.indices, portions.indptr),
+        shape=portions.shape,
+    )
+    has_nutrient = pattern @ present.astype(np.int32) > 0
+
+    new_data = {}
+    for row, (name, composition) in enumerate(compounds.items()):
+        weight = sum(composition.values())
+        if weight == 0:
+            raise ZeroDivisionError(f"Dish {name} has zero weight")
+        price_item = item_prices[row]
+        dish_totals = totals[row]
+        columns = np.flatnonzero(has_nutrient[row]).tolist()
+        new_data[name] = {
+            "category": "Блюдо",
+            "price": {
+                "item": price_item,
+                "kg": round(price_item / weight * 1000, 2),
+                "100g": round(price_item / weight * 100, 2),
+            },
+            "weight": weight,
+            "nutrients_in_100g": {
+                food.nutrients[column]: round(dish_totals[column] / weight * 100, 2)
+                for column in columns
+            },
+            "nutrients_total": {
+                food.nutrients[column]: round(dish_totals[column], 2)
+                for column in columns
+            },
+        }
+    return new_data
+
+
+def dish_graph(dishes):
+    # dish -> the dishes it is made of; a dish shadows a product of the
+    # same name, so every ingredient that is a dish is a dependency
+    return {
+        dish: [item for item in composition if item in dishes]
+        for dish, composition in dishes.items()
+    }
+
+
+def _find_cycle(graph, nodes):
+    path = []
+    on_path = set()
+    visited = set()
+
+    def visit(node):
+        path.append(node)
+        on_path.add(node)
+        for dependency in graph[node]:
+            if dependency in on_path:
+                return path[path.index(dependency) :] + [dependency]
+            if dependency in nodes and dependency not in visited:
+                cycle = visit(dependency)
+                if cycle:
+                    return cycle
+        visited.add(node)
+        on_path.discard(node)
+        path.pop()
+        return None
+
+    for node in nodes:
+        if node not in visited:
+            cycle = visit(node)
+            if cycle:
+                return cycle
+    return None
+
+
+def dish_levels(graph, nodes=None):
+    # Kahn's algorithm grouped by depth: every dish of a level depends only
+    # on products and dishes of earlier levels, so a level is one batch
+    nodes = set(graph) if nodes is None else set(nodes)
+    pending = {
+        node: sum(dependency in nodes for dependency in graph[node]) for node in nodes
+    }
+    dependents = {node: [] for node in nodes}
+    for node in nodes:
+        for dependency in graph[node]:
+            if dependency in nodes:
+                dependents[dependency].append(node)
+
+    levels = []
+    level = [node for node in graph if node in nodes and pending[node] == 0]
+    while level:
+        levels.append(level)
+        next_level = []
+        for node in level:
+            for dependent in dependents[node]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    next_level.append(dependent)
+        level = next_level
+
+    if sum(len(level) for level in levels) < len(nodes):
+        unresolved = [node for node in graph if node in nodes and pending[node] > 0]
+        cycle = _find_cycle(graph, unresolved)
+        raise ValueError("Dish cycle: " + " -> ".join(cycle))
+    return levels
+
+
+class DishResolver:
+    # Computes dishes whose ingredients may be other dishes. Results are
+    # memoized, and changing a product or a dish recomputes only the dishes
+    # that (transitively) contain it.
+    def __init__(self, dishes, data, resolved=None):
+        self.data = data
+        self.records = dict(resolved or {})
+        self._set_dishes(dict(dishes))
+
+    def _set_dishes(self, dishes):
+        graph = dish_graph(dishes)
+        dish_levels(graph)
+        self.dishes = dishes
+        self.graph = graph
+        # ingredient (product or dish) -> the dishes that contain it
+        self.users = {}
+        for dish, composition in dishes.items():
+            for item in composition:
+                self.users.setdefault(item, []).append(dish)
+
+    def ingredient(self, item):
+        if item in self.dishes:
+            return self.records[item]
+        return self.data[item]
+
+    def resolve(self, names=None):
+        missing = self.dishes if names is None else names
+        for level in dish_levels(self.graph, self._unresolved(missing)):
+            compounds = {dish: self.dishes[dish] for dish in level}
+            ingredients = {
+                item: self.ingredient(item)
+                for composition in compounds.values()
+                for item in composition
+                if item in self.dishes or item in self.data
+            }
+            self.records.update(compute_dishes(compounds, ingredients))
+        return self.records
+
+    def _unresolved(self, names):
+        found = set()
+        stack = list(names)
+        while stack:
+            dish = stack.pop()
+            if dish in found or dish in self.records:
+                continue
+            found.add(dish)
+            stack.extend(self.graph[dish])
+        return found
+
+    def downstream(self, names):
+        found = set()
+        stack = [dish for name in names for dish in self.users.get(name, ())]
+        while stack:
+            dish = stack.pop()
+            if dish not in found:
+                found.add(dish)
+                stack.extend(self.users.get(dish, ()))
+        return found
+
+    def update(self, name, record=None, composition=None):
+        # new product data (record) or a new dish composition; returns the
+        # names of the recomputed dishes
+        if composition is not None:
+            self._set_dishes({**self.dishes, name: composition})
+            stale = self.downstream([name]) | {name}
+        else:
+            self.data[name] = record
+            stale = self.downstream([name])
+        for dish in stale:
+            self.records.pop(dish, None)
+        self.resolve(stale)
+        return stale
+
+
+class RationTotals:
+    # Running nutrient totals of a ration edited one item at a time: a new
+    # weight adds (new - old) x the item's per-gram nutrients instead of
+    # recomputing the whole ration. Items are keyed by the caller (e.g. an
+    # entry row), so the same dish may appear twice.
+    def __init__(self, food):
+        self.food = food
+        self.totals = np.zeros(len(food.nutrients))
+        self.present = np.zeros(len(food.nutrients), dtype=np.int64)
+        self.items = {}
+
+    def _per_gram(self, row):
+        values = self.food.values[row]
+        return np.where(np.isnan(values), 0, values) / 100
+
+    def set(self, key, name, weight):
+        old_row, old_weight = self.items.pop(key, (None, 0))
+        row = self.food.index.get(name)
+        if row is None or not weight:
+            row, weight = None, 0
+        else:
+            self.items[key] = (row, weight)
+
+        if row is not None and row == old_row:
+            self.totals += (weight - old_weight) * self._per_gram(row)
+            return
+        if old_row is not None:
+            self.totals -= old_weight * self._per_gram(old_row)
+            self.present -= ~np.isnan(self.food.values[old_row])
+        if row is not None:
+            self.totals += weight * self._per_gram(row)
+            self.present += ~np.isnan(self.food.values[row])
+        if not self.items:
+            # no rounding drift survives an emptied ration
+            self.totals[:] = 0
+
+    def remove(self, key):
+        self.set(key, None, 0)
+
+    def nutrients_total(self):
+        # same keys and rounding as compute_dishes()[...]["nutrients_total"]
+        columns = np.flatnonzero(self.present)
+        totals = np.round(self.totals[columns], 2).tolist()
+        return {
+            self.food.nutrients[column]: total for column, total in zip(columns, totals)
+        }
@@ -0,0 +1,357 @@
+import os
+
+import numpy as np
+
+from data import load_json, save_json
+
+NUTRIENT_KEYS = [
+    "Water_(g)",
+    "Energ_Kcal",
+    "Protein_(g)",
+    "Lipid_Tot_(g)",
+    "Ash_(g)",
+    "Carbohydrt_(g)",
+    "Fiber_TD_(g)",
+    "Sugar_Tot_(g)",
+    "Calcium_(mg)",
+    "Iron_(mg)",
+    "Magnesium_(mg)",
+    "Phosphorus_(mg)",
+    "Potassium_(mg)",
+    "Sodium_(mg)",
+    "Zinc_(mg)",
+    "Copper_mg)",
+    "Manganese_(mg)",
+    "Selenium_(µg)",
+    "Vit_C_(mg)",
+    "Thiamin_(mg)",
+    "Riboflavin_(mg)",
+    "Niacin_(mg)",
+    "Panto_Acid_mg)",
+    "Vit_B6_(mg)",
+    "Folate_Tot_(µg)",
+    "Folic_Acid_(µg)",
+    "Food_Folate_(µg)",
+    "Folate_DFE_(µg)",
+    "Choline_Tot_ (mg)",
+    "Vit_B12_(µg)",
+    "Vit_A_IU",
+    "Vit_A_RAE",
+    "Retinol_(µg)",
+    "Alpha_Carot_(µg)",
+    "Beta_Carot_(µg)",
+    "Beta_Crypt_(µg)",
+    "Lycopene_(µg)",
+    "Lut+Zea_ (µg)",
+    "Vit_E_(mg)",
+    "Vit_D_µg",
+    "Vit_D_IU",
+    "Vit_K_(µg)",
+    "FA_Sat_(g)",
+    "FA_Mono_(g)",
+    "FA_Poly_(g)",
+    "Cholestrl_(mg)",
+    "vegetables_fruits",
+]
+
+BUNDLE_ARRAYS = [
+    "values",
+    "prices",
+    "max_weights",
+    "weights",
+    "category_codes",
+    "presence",
+    "item_prices",
+]
+BUNDLE_VERSION = 2
+# price units of products sold by the piece (bought in whole packs)
+PIECE_UNIT = "шт"
+PIECE_PRICE_UNIT = "руб/" + PIECE_UNIT
+
+
+class FoodMatrix:
+    def __init__(
+        self,
+        names,
+        nutrients,
+        values,
+        prices,
+        max_weights,
+        weights,
+        category_codes,
+        categories,
+        presence=None,
+        item_prices=None,
+    ):
+        self.names = list(names)
+        self.nutrients = list(nutrients)
+        self.values = np.asarray(values)
+        self.prices = np.asarray(prices, dtype=self.values.dtype)
+        self.max_weights = np.asarray(max_weights, dtype=self.values.dtype)
+        self.weights = np.asarray(weights, dtype=self.values.dtype)
+        self.category_codes = np.asarray(category_codes, dtype=np.int32)
+        self.categories = list(categories)
+        # price of one pack for products sold by the piece, NaN otherwise
+        if item_prices is None:
+            item_prices = np.full(len(self.names), np.nan)
+        self.item_prices = np.asarray(item_prices, dtype=self.values.dtype)
+        self.index = {name: row for row, name in enumerate(self.names)}
+        self.nutrient_index = {
+            nutrient: column for column, nutrient in enumerate(self.nutrients)
+        }
+        # one bit per nutrient column: set when the product has a value for it
+        if presence is None:
+            presence = np.packbits(~np.isnan(self.values), axis=1, bitorder="little")
+        self.presence = presence
+
+    @classmethod
+    def from_dict(cls, data, nutrients=None, dtype=np.float64):
+        builder = FoodMatrixBuilder(nutrients)
+        for name, product_data in data.items():
+            builder.add(name, product_data)
+        return builder.build(dtype=dtype)
+
+    def record(self, name):
+        # the opt_data.json layout: only the fields the matrix stores.
+        # Database-only fields (price "kg", nutrients_total,
+        # nutrients_in_kcal, nutrients_in_rouble) are not kept.
+        row = self.index[name]
+        product_data = {}
+        if self.category_codes[row] >= 0:
+            product_data["category"] = self.categories[self.category_codes[row]]
+        if not np.isnan(self.weights[row]):
+            weight = self.weights[row].item()
+            product_data["weight"] = int(weight) if weight.is_integer() else weight
+        product_data["price"] = {}
+        if not np.isnan(self.prices[row]):
+            product_data["price"]["100g"] = self.prices[row].item()
+        if not np.isnan(self.item_prices[row]):
+            product_data["price"]["item"] = self.item_prices[row].item()
+            product_data["price"]["unit"] = PIECE_PRICE_UNIT
+        if not np.isnan(self.max_weights[row]):
+            product_data["max_weight"] = self.max_weights[row].item()
+        present = ~np.isnan(self.values[row])
+        product_data["nutrients_in_100g"] = {
+            self.nutrients[column]: self.values[row, column].item()
+            for column in np.flatnonzero(present)
+        }
+        return product_data
+
+    def records(self, names):
+        return {name: self.record(name) for name in names if name in self.index}
+
+    def to_dict(self):
+        return self.records(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def nbytes(self):
+        return sum(
+            array.nbytes
+            for array in (
+                self.values,
+                self.prices,
+                self.max_weights,
+                self.weights,
+                self.category_codes,
+                self.item_prices,
+            )
+        )
+
+    def row(self, name):
+        return self.values[self.index[name]]
+
+    def column(self, nutrient):
+        return self.values[:, self.nutrient_index[nutrient]]
+
+    def columns(self, nutrients):
+        return self.values[:, [self.nutrient_index[nutrient] for nutrient in nutrients]]
+
+    def nutrient_mask(self, nutrients):
+        required = np.zeros(len(self.nutrients), dtype=bool)
+        required[[self.nutrient_index[nutrient] for nutrient in nutrients]] = True
+        return np.packbits(required, bitorder="little")
+
+    def select(
+        self,
+        nutrients=(),
+        has_price=False,
+        exclude_categories=(),
+        max_price=None,
+    ):
+        selected = np.ones(len(self), dtype=bool)
+        if nutrients:
+            required = self.nutrient_mask(nutrients)
+            selected &= ((self.presence & required) == required).all(axis=1)
+        if has_price:
+            selected &= ~np.isnan(self.prices)
+        if exclude_categories:
+            excluded_codes = [
+                code
+                for code, category in enumerate(self.categories)
+                if category in exclude_categories
+            ]
+            selected &= ~np.isin(self.category_codes, excluded_codes)
+        if max_price is not None:
+            with np.errstate(invalid="ignore"):
+                selected &= self.prices <= max_price
+        return selected
+
+    def subset(self, rows):
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        return FoodMatrix(
+            [self.names[row] for row in rows],
+            self.nutrients,
+            self.values[rows],
+            self.prices[rows],
+            self.max_weights[rows],
+            self.weights[rows],
+            self.category_codes[rows],
+            self.categories,
+            presence=self.presence[rows],
+            item_prices=self.item_prices[rows],
+        )
+
+
+class FoodMatrixBuilder:
+    # collects products one at a time, e.g. while a database is streamed
+    def __init__(self, nutrients=None):
+        self.extend_nutrients = nutrients is None
+        self.nutrients = list(NUTRIENT_KEYS if nutrients is None else nutrients)
+        self.nutrient_index = {
+            nutrient: column for column, nutrient in enumerate(self.nutrients)
+        }
+        self.names = []
+        self.rows = []
+        self.prices = []
+        self.item_prices = []
+        self.max_weights = []
+        self.weights = []
+        self.category_codes = []
+        self.categories = []
+        self.category_index = {}
+
+    def add(self, name, product_data):
+        columns = []
+        amounts = []
+        for nutrient, amount in product_data.get("nutrients_in_100g", {}).items():
+            if nutrient not in self.nutrient_index:
+                if not self.extend_nutrients:
+                    continue
+                self.nutrient_index[nutrient] = len(self.nutrients)
+                self.nutrients.append(nutrient)
+            columns.append(self.nutrient_index[nutrient])
+            amounts.append(amount)
+        self.names.append(name)
+        self.rows.append(
+            (np.array(columns, dtype=np.int32), np.array(amounts, dtype=float))
+        )
+
+        price = product_data.get("price", {})
+        price_100g = price.get("100g")
+        self.prices.append(np.nan if price_100g is None else price_100g)
+        item_price = price.get("item")
+        if item_price is None or PIECE_UNIT not in price.get("unit", ""):
+            item_price = np.nan
+        self.item_prices.append(item_price)
+        max_weight = product_data.get("max_weight")
+        self.max_weights.append(np.nan if max_weight is None else max_weight)
+        self.weights.append(product_data.get("weight") or np.nan)
+
+        category = product_data.get("category")
+        if category is None:
+            self.category_codes.append(-1)
+            return
+        if category not in self.category_index:
+            self.category_index[category] = len(self.categories)
+            self.categories.append(category)
+        self.category_codes.append(self.category_index[category])
+
+    def build(self, dtype=np.float64):
+        values = np.full((len(self.names), len(self.nutrients)), np.nan, dtype=dtype)
+        for row, (columns, amounts) in enumerate(self.rows):
+            values[row, columns] = amounts
+        return FoodMatrix(
+            self.names,
+            self.nutrients,
+            values,
+            self.prices,
+            self.max_weights,
+            self.weights,
+            self.category_codes,
+            self.categories,
+            item_prices=self.item_prices,
+        )
+
+
+def load_food_matrix(file_path, nutrients=None, dtype=np.float64):
+    return FoodMatrix.from_dict(load_json(file_path), nutrients=nutrients, dtype=dtype)
+
+
+def save_food_matrix(file_path, food_matrix):
+    # writes opt_data.json-style records (see FoodMatrix.record), not a
+    # full food_database.json
+    save_json(file_path, food_matrix.to_dict())
+
+
+def bundle_path(json_path):
+    return os.path.splitext(json_path)[0] + ".bundle"
+
+
+def save_food_bundle(dir_path, food_matrix):
+    os.makedirs(dir_path, exist_ok=True)
+    for attribute in BUNDLE_ARRAYS:
+        np.save(
+            os.path.join(dir_path, attribute + ".npy"), getattr(food_matrix, attribute)
+        )
+    # the manifest goes last: a bundle without one is never read
+    save_json(
+        os.path.join(dir_path, "manifest.json"),
+        {
+            "version": BUNDLE_VERSION,
+            "names": food_matrix.names,
+            "nutrients": food_matrix.nutrients,
+            "categories": food_matrix.categories,
+        },
+        compact=True,
+    )
+
+
+def load_food_bundle(dir_path):
+    manifest = load_json(os.path.join(dir_path, "manifest.json"))
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported food bundle version in {dir_path}")
+    arrays = {
+        attribute: np.load(os.path.join(dir_path, attribute + ".npy"), mmap_mode="r")
+        for attribute in BUNDLE_ARRAYS
+    }
+    return FoodMatrix(
+        manifest["names"],
+        manifest["nutrients"],
+        arrays["values"],
+        arrays["prices"],
+        arrays["max_weights"],
+        arrays["weights"],
+        arrays["category_codes"],
+        manifest["categories"],
+        presence=arrays["presence"],
+        item_prices=arrays["item_prices"],
+    )
+
+
+def open_food_database(json_path):
+    # the binary bundle next to the JSON file is used unless it is stale
+    manifest_path = os.path.join(bundle_path(json_path), "manifest.json")
+    if os.path.exists(manifest_path) and (
+        not os.path.exists(json_path)
+        or os.path.getmtime(manifest_path) >= os.path.getmtime(json_path)
+    ):
+        try:
+            return load_food_bundle(bundle_path(json_path))
+        except ValueError:
+            pass
+    return load_food_matrix(json_path)
@@ -0,0 +1,79 @@
+import re
+
+_TOKEN_RE = re.compile(r"\w+")
+_ANCHOR_RE = re.compile(r"\\b(\w+)")
+_QUANTIFIERS = "?*+{"
+
+
+def tokenize(name_lower):
+    return _TOKEN_RE.findall(name_lower)
+
+
+def _pattern_anchor(pattern):
+    # Returns (kind, literal) such that every string matched by `pattern`
+    # contains a \w+ token equal to ("exact") or starting with ("prefix")
+    # the literal, or None when the pattern cannot be reduced safely.
+    if "|" in pattern:
+        return None
+    match = _ANCHOR_RE.match(pattern)
+    if not match:
+        return None
+    literal = match.group(1)
+    rest = pattern[match.end() :]
+    if rest and rest[0] in _QUANTIFIERS:
+        literal = literal[:-1]
+        kind = "prefix"
+    elif rest.startswith(r"\b") or rest.startswith(" "):
+        kind = "exact"
+    else:
+        kind = "prefix"
+    if not literal:
+        return None
+    return kind, literal
+
+
+class NameMatcher:
+    def __init__(self, mapping):
+        self.keys = list(mapping)
+        self.rules = []
+        self.exact_index = {}
+        self.prefix_index = {}
+        self.unindexed = []
+
+        for rule_idx, (key, rule) in enumerate(mapping.items()):
+            required = [re.compile(word) for word in rule["required_words"]]
+            optional = [re.compile(word) for word in rule["optional_words"]]
+            self.rules.append((key, required, optional))
+
+            anchors = [_pattern_anchor(word) for word in rule["required_words"]]
+            anchors = [anchor for anchor in anchors if anchor]
+            if not anchors:
+                self.unindexed.append(rule_idx)
+                continue
+            kind, literal = max(
+                anchors, key=lambda anchor: (anchor[0] == "exact", len(anchor[1]))
+            )
+            index = self.exact_index if kind == "exact" else self.prefix_index
+            index.setdefault(literal, []).append(rule_idx)
+
+        self.prefix_lengths = sorted({len(literal) for literal in self.prefix_index})
+
+    def candidates(self, tokens):
+        found = set(self.unindexed)
+        for token in tokens:
+            found.update(self.exact_index.get(token, ()))
+            for length in self.prefix_lengths:
+                if length > len(token):
+                    break
+                found.update(self.prefix_index.get(token[:length], ()))
+        return sorted(found)
+
+    def match(self, name):
+        name_lower = name.lower()
+        for rule_idx in self.candidates(set(tokenize(name_lower))):
+            key, required, optional = self.rules[rule_idx]
+            required_fits = all(word.search(name_lower) for word in required)
+            optional_fits = any(word.search(name_lower) for word in optional)
+            if required_fits and (not optional or optional_fits):
+                return key
+        return None
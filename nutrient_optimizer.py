@@ -4,68 +4,24 @@ from functools import cmp_to_key
 
 import numpy as np
 import pandas as pd
-from scipy.optimize import linprog
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, linprog, milp
 
-from data import load_json, save_json
+try:
+    import highspy
+except ImportError:
+    highspy = None
+
+from food_matrix import NUTRIENT_KEYS, FoodMatrix, open_food_database
 from nutrient_ranges import calculate_nutrient_ranges
 
 
 def filter_full_data_products(data):
     full_data_products = {}
 
-    nutrient_keys = [
-        "Water_(g)",
-        "Energ_Kcal",
-        "Protein_(g)",
-        "Lipid_Tot_(g)",
-        "Ash_(g)",
-        "Carbohydrt_(g)",
-        "Fiber_TD_(g)",
-        "Sugar_Tot_(g)",
-        "Calcium_(mg)",
-        "Iron_(mg)",
-        "Magnesium_(mg)",
-        "Phosphorus_(mg)",
-        "Potassium_(mg)",
-        "Sodium_(mg)",
-        "Zinc_(mg)",
-        "Copper_mg)",
-        "Manganese_(mg)",
-        "Selenium_(µg)",
-        "Vit_C_(mg)",
-        "Thiamin_(mg)",
-        "Riboflavin_(mg)",
-        "Niacin_(mg)",
-        "Panto_Acid_mg)",
-        "Vit_B6_(mg)",
-        "Folate_Tot_(µg)",
-        "Folic_Acid_(µg)",
-        "Food_Folate_(µg)",
-        "Folate_DFE_(µg)",
-        "Choline_Tot_ (mg)",
-        "Vit_B12_(µg)",
-        "Vit_A_IU",
-        "Vit_A_RAE",
-        "Retinol_(µg)",
-        "Alpha_Carot_(µg)",
-        "Beta_Carot_(µg)",
-        "Beta_Crypt_(µg)",
-        "Lycopene_(µg)",
-        "Lut+Zea_ (µg)",
-        "Vit_E_(mg)",
-        "Vit_D_µg",
-        "Vit_D_IU",
-        "Vit_K_(µg)",
-        "FA_Sat_(g)",
-        "FA_Mono_(g)",
-        "FA_Poly_(g)",
-        "Cholestrl_(mg)",
-        "vegetables_fruits",
-    ]
-
     for product, product_data in data.items():
         nutrients_in_100g = product_data.get("nutrients_in_100g", {})
-        if all(nutrient in nutrients_in_100g for nutrient in nutrient_keys):
+        if all(nutrient in nutrients_in_100g for nutrient in NUTRIENT_KEYS):
             full_data_products[product] = product_data
 
     return full_data_products
@@ -81,83 +37,692 @@ def filter_price(data):
     return filtered_data
 
 
-# data = load_json('D:/YandexDisk/food/code/food_database.json')
-data = load_json("D:/YandexDisk/food/code/opt_data.json")
-filtered_data = filter_full_data_products(data)
-filtered_data = filter_price(filtered_data)
-
-nutrient_ranges = calculate_nutrient_ranges(
-    gender="female",
-    height=1.7,
-    weight_cur=64,
-    age=32,
-    activity_multiplier=1.375,
-    breastfeeding=True,
-)
-
-
-def get_optimal_diet(filtered_data, nutrient_ranges):
-    product_names = list(filtered_data.keys())
-    product_nutrients = [
-        product["nutrients_in_100g"] for product in filtered_data.values()
+def nutrient_matrix(food, nutrients):
+    matrix = np.zeros((len(food), len(nutrients)))
+    known = [
+        column
+        for column, nutrient in enumerate(nutrients)
+        if nutrient in food.nutrient_index
     ]
-    max_weights = [product["max_weight"] / 100 for product in filtered_data.values()]
-    product_prices = [product["price"]["100g"] for product in filtered_data.values()]
-
-    n_products = len(product_names)
-    n_nutrients = len(product_nutrients[0])
-
-    c = product_prices
+    matrix[:, known] = food.columns([nutrients[column] for column in known])
+    return np.nan_to_num(matrix)
+
+
+def _bounded_nutrients(nutrient_ranges):
+    return tuple(nutrient for nutrient in nutrient_ranges if nutrient != "Energ_Kcal")
+
+
+def _override(base, values, index):
+    if values is None:
+        return base
+    if isinstance(values, dict):
+        overridden = base.copy()
+        for name, value in values.items():
+            overridden[index[name]] = value
+        return overridden
+    return np.asarray(values, dtype=float)
+
+
+def presolve_catalog(lp, similarity=0.999):
+    # Products are visited from the cheapest kcal up. A product whose
+    # nutrient profile is within `similarity` (cosine) of an already kept
+    # one is dropped once the kept look-alikes can supply the whole energy
+    # target on their own, so they can never all be capped out.
+    energy = lp["A_eq"].toarray()[0]
+    n_bounded = lp["A_ub"].shape[0] // 2
+    vectors = lp["A_ub"][n_bounded:].T.toarray()
+    norms = np.linalg.norm(vectors, axis=1)
+    unit_vectors = vectors / np.where(norms > 0, norms, 1)[:, None]
+    kcal_capacity = lp["bounds"][:, 1] * energy
+    kcal_target = lp["b_eq"][0]
+
+    keep = np.ones(len(energy), dtype=bool)
+    candidates = np.flatnonzero((energy > 0) & (norms > 0))
+    order = candidates[np.argsort(lp["c"][candidates] / energy[candidates])]
+
+    leaders = np.empty((len(order), vectors.shape[1]))
+    leader_capacity = np.empty(len(order))
+    n_leaders = 0
+    for product in order:
+        if n_leaders:
+            similarities = leaders[:n_leaders] @ unit_vectors[product]
+            leader = np.argmax(similarities)
+            if similarities[leader] >= similarity:
+                if leader_capacity[leader] >= kcal_target:
+                    keep[product] = False
+                else:
+                    leader_capacity[leader] += kcal_capacity[product]
+                continue
+        leaders[n_leaders] = unit_vectors[product]
+        leader_capacity[n_leaders] = kcal_capacity[product]
+        n_leaders += 1
+
+    return keep
+
+
+def pricing_pruned_products(lp, candidates, per_nutrient=20):
+    # Among the candidates, keeps only the `per_nutrient` cheapest sources
+    # (lowest price per unit) of energy and of every bounded nutrient and
+    # marks the rest as pruned. This is not a dominance test: a pruned
+    # product may still be needed, which is why solve_presolved_lp prices
+    # the pruned products out and re-adds any whose reduced cost turns
+    # negative.
+    n_bounded = lp["A_ub"].shape[0] // 2
+    supplies = np.column_stack(
+        [lp["A_eq"].toarray()[0], lp["A_ub"][n_bounded:].T.toarray()]
+    )
+    rows = np.flatnonzero(candidates)
+    pruned = candidates.copy()
+    if len(rows) <= per_nutrient:
+        pruned[rows] = False
+        return pruned
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unit_prices = np.where(
+            supplies[rows] > 0, lp["c"][rows, None] / supplies[rows], np.inf
+        )
+    cheapest = np.argpartition(unit_prices, per_nutrient - 1, axis=0)[:per_nutrient]
+    sources = np.isfinite(np.take_along_axis(unit_prices, cheapest, axis=0))
+    pruned[rows[cheapest[sources]]] = False
+    return pruned
+
+
+def _sub_lp(lp, columns):
+    sub_lp = dict(lp)
+    sub_lp["c"] = lp["c"][columns]
+    sub_lp["A_ub"] = lp["A_ub"][:, columns]
+    sub_lp["A_eq"] = lp["A_eq"][:, columns]
+    sub_lp["bounds"] = lp["bounds"][columns]
+    return sub_lp
+
+
+def solve_presolved_lp(lp, similarity=0.999, per_nutrient=20, max_rounds=10):
+    distinct = presolve_catalog(lp, similarity=similarity)
+    pruned = pricing_pruned_products(lp, distinct, per_nutrient=per_nutrient)
+    keep = distinct & ~pruned
+    n_products = len(keep)
+    report = {
+        "products": n_products,
+        "near_duplicates_dropped": int(n_products - distinct.sum()),
+        "pricing_pruned": int(pruned.sum()),
+        "initial_columns": int(keep.sum()),
+        "rounds": 0,
+    }
+
+    for _ in range(max_rounds):
+        report["rounds"] += 1
+        columns = np.flatnonzero(keep)
+        result = linprog(**_sub_lp(lp, columns), method="highs")
+        if not result.success:
+            break
+        # the reduced optimum is optimal for the whole catalog iff no dropped
+        # product has a negative reduced cost under its duals
+        reduced_costs = (
+            lp["c"]
+            - lp["A_ub"].T @ result.ineqlin.marginals
+            - lp["A_eq"].T @ result.eqlin.marginals
+        )
+        entering = ~keep & (reduced_costs < -1e-9)
+        if not entering.any():
+            x = np.zeros(n_products)
+            x[columns] = result.x
+            result.x = x
+            report["final_columns"] = int(keep.sum())
+            result.presolve = report
+            return result
+        keep |= entering
+
+    # no certificate within max_rounds (or the reduced LP is infeasible)
+    result = linprog(**lp, method="highs")
+    report["final_columns"] = n_products
+    result.presolve = report
+    return result
+
+
+class _CostSolver:
+    # Solves one feasible region for changing costs. With highspy the model
+    # is kept between solves and each one starts from the previous basis
+    # (warm); without it every solve is a cold linprog.
+    def __init__(self, lp):
+        self.lp = lp
+        self.warm = highspy is not None
+        if not self.warm:
+            return
+        A = sparse.vstack([lp["A_ub"], lp["A_eq"]], format="csc")
+        model = highspy.HighsLp()
+        model.num_row_, model.num_col_ = A.shape
+        model.col_cost_ = np.zeros(A.shape[1])
+        model.col_lower_ = lp["bounds"][:, 0]
+        model.col_upper_ = np.minimum(lp["bounds"][:, 1], highspy.kHighsInf)
+        model.row_lower_ = np.concatenate(
+            [np.full(len(lp["b_ub"]), -highspy.kHighsInf), lp["b_eq"]]
+        )
+        model.row_upper_ = np.concatenate([lp["b_ub"], lp["b_eq"]])
+        model.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        model.a_matrix_.start_ = A.indptr
+        model.a_matrix_.index_ = A.indices
+        model.a_matrix_.value_ = A.data
+        self.highs = highspy.Highs()
+        self.highs.setOptionValue("output_flag", False)
+        self.highs.passModel(model)
+        self.columns = np.arange(A.shape[1], dtype=np.int32)
+
+    def solve(self, c):
+        # optimal x for costs c, or None
+        if not self.warm:
+            result = linprog(c, **self.lp, method="highs")
+            return result.x if result.success else None
+        self.highs.changeColsCost(len(self.columns), self.columns, c)
+        self.highs.run()
+        if self.highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            return None
+        return np.array(self.highs.getSolution().col_value)
+
+
+class DietModel:
+    def __init__(self, food):
+        self.food = food
+        self.A_eq = sparse.csr_matrix(nutrient_matrix(food, ["Energ_Kcal"]).T)
+        self._A_ub_cache = {}
+
+    @classmethod
+    def from_dict(cls, filtered_data):
+        return cls(FoodMatrix.from_dict(filtered_data))
+
+    def A_ub(self, bounded_nutrients):
+        # the constraint structure only depends on which nutrients are bounded,
+        # so profiles of the same gender share one matrix
+        if bounded_nutrients not in self._A_ub_cache:
+            nutrient_rows = sparse.csr_matrix(
+                nutrient_matrix(self.food, bounded_nutrients).T
+            )
+            self._A_ub_cache[bounded_nutrients] = sparse.vstack(
+                [-nutrient_rows, nutrient_rows], format="csr"
+            )
+        return self._A_ub_cache[bounded_nutrients]
+
+    def build_lp(self, nutrient_ranges, prices=None, max_weights=None):
+        bounded_nutrients = _bounded_nutrients(nutrient_ranges)
+        ranges = np.array(
+            [nutrient_ranges[nutrient] for nutrient in bounded_nutrients]
+        ).reshape(-1, 5)
+
+        prices = _override(self.food.prices, prices, self.food.index)
+        max_weights = _override(self.food.max_weights, max_weights, self.food.index)
+        upper_bounds = np.nan_to_num(max_weights / 100, nan=np.inf)
+
+        return {
+            "c": prices,
+            "A_ub": self.A_ub(bounded_nutrients),
+            "b_ub": np.concatenate([-ranges[:, 1], ranges[:, 4]]),
+            "A_eq": self.A_eq,
+            "b_eq": np.array([nutrient_ranges["Energ_Kcal"][2]]),
+            "bounds": np.column_stack([np.zeros(len(self.food)), upper_bounds]),
+        }
+
+    def solve_lp(self, nutrient_ranges, prices=None, max_weights=None, presolve=False):
+        lp = self.build_lp(nutrient_ranges, prices=prices, max_weights=max_weights)
+        if presolve:
+            return solve_presolved_lp(lp)
+        return linprog(**lp, method="highs")
+
+    def solve(self, nutrient_ranges, prices=None, max_weights=None, presolve=False):
+        result = self.solve_lp(
+            nutrient_ranges,
+            prices=prices,
+            max_weights=max_weights,
+            presolve=presolve,
+        )
+        if not result.success:
+            return "not success"
+        return self.diet_from_weights(result.x)
+
+    def sensitivity_report(self, nutrient_ranges, prices=None, max_weights=None):
+        lp = self.build_lp(nutrient_ranges, prices=prices, max_weights=max_weights)
+        result = linprog(**lp, method="highs")
+        if not result.success:
+            return "not success"
+
+        bounded_nutrients = _bounded_nutrients(nutrient_ranges)
+        n_bounded = len(bounded_nutrients)
+        amounts = lp["A_ub"][n_bounded:] @ result.x
+        # marginals are d(cost)/d(b); b of a lower-bound row is -min
+        min_marginals = -result.ineqlin.marginals[:n_bounded]
+        max_marginals = result.ineqlin.marginals[n_bounded:]
+
+        nutrients = {
+            "Energ_Kcal": {
+                "amount": float((lp["A_eq"] @ result.x)[0]),
+                "target": float(lp["b_eq"][0]),
+                "binding": "target",
+                "marginal_cost": float(result.eqlin.marginals[0]),
+            }
+        }
+        for i, nutrient in enumerate(bounded_nutrients):
+            if min_marginals[i] > 1e-9:
+                binding = "min"
+            elif max_marginals[i] < -1e-9:
+                binding = "max"
+            else:
+                binding = None
+            nutrients[nutrient] = {
+                "amount": float(amounts[i]),
+                "min": float(nutrient_ranges[nutrient][1]),
+                "max": float(nutrient_ranges[nutrient][4]),
+                "binding": binding,
+                "min_marginal_cost": float(min_marginals[i]),
+                "max_marginal_cost": float(max_marginals[i]),
+            }
+
+        reduced_costs = (
+            lp["c"]
+            - lp["A_ub"].T @ result.ineqlin.marginals
+            - lp["A_eq"].T @ result.eqlin.marginals
+        )
+        # price per 100 g below which a product outside the diet enters it.
+        # It is None for products already in the diet and for those whose
+        # nutrients are worth nothing at the optimum (c - reduced cost <= 0,
+        # e.g. they only add to nutrients at their max): those cannot enter
+        # at any non-negative price.
+        entering_prices = lp["c"] - reduced_costs
+        products = {}
+        for i, name in enumerate(self.food.names):
+            in_diet = result.x[i] * 100 > 1e-6
+            products[name] = {
+                "amount": float(result.x[i] * 100),
+                "price_100g": float(lp["c"][i]),
+                "reduced_cost": float(reduced_costs[i]),
+                "entering_price": (
+                    None
+                    if in_diet or entering_prices[i] <= 0
+                    else float(entering_prices[i])
+                ),
+                "max_weight_marginal_cost": float(result.upper.marginals[i] / 100),
+            }
+
+        return {
+            "cost": float(result.fun),
+            "diet": self.diet_from_weights(result.x),
+            "nutrients": nutrients,
+            "products": products,
+        }
+
+    def diagnose_infeasibility(
+        self, nutrient_ranges, prices=None, max_weights=None, iis=False
+    ):
+        lp = self.build_lp(nutrient_ranges, prices=prices, max_weights=max_weights)
+        bounded_nutrients = _bounded_nutrients(nutrient_ranges)
+        n_bounded = len(bounded_nutrients)
+        n_rows = 2 * n_bounded
+        n_products = len(self.food)
+        constraints = [(nutrient, "min") for nutrient in bounded_nutrients] + [
+            (nutrient, "max") for nutrient in bounded_nutrients
+        ]
+
+        # elastic relaxation: one slack per nutrient row and two for the
+        # energy target, costed relative to the size of the bound
+        limits = np.concatenate([-lp["b_ub"][:n_bounded], lp["b_ub"][n_bounded:]])
+        energy_target = lp["b_eq"][0]
+        scales = np.maximum(np.abs(np.append(limits, energy_target)), 1)
+        c = np.concatenate(
+            [np.zeros(n_products), 1 / scales[:n_rows], np.full(2, 1 / scales[-1])]
+        )
+        A_ub = sparse.hstack(
+            [
+                lp["A_ub"],
+                -sparse.identity(n_rows, format="csr"),
+                sparse.csr_matrix((n_rows, 2)),
+            ],
+            format="csr",
+        )
+        A_eq = sparse.hstack(
+            [lp["A_eq"], sparse.csr_matrix((1, n_rows)), np.array([[1, -1]])],
+            format="csr",
+        )
+        bounds = np.vstack(
+            [
+                lp["bounds"],
+                np.column_stack([np.zeros(n_rows + 2), np.full(n_rows + 2, np.inf)]),
+            ]
+        )
+        result = linprog(
+            c,
+            A_ub=A_ub,
+            b_ub=lp["b_ub"],
+            A_eq=A_eq,
+            b_eq=lp["b_eq"],
+            bounds=bounds,
+            method="highs",
+        )
+        if not result.success:
+            # only product caps are hard, so this means the caps themselves
+            # cannot be met (e.g. an empty catalog)
+            return "not success"
+
+        x = result.x[:n_products]
+        slacks = result.x[n_products:]
+        amounts = np.concatenate(
+            [lp["A_ub"][n_bounded:] @ x, lp["A_ub"][n_bounded:] @ x]
+        )
+        violations = {}
+        for row, (nutrient, bound) in enumerate(constraints):
+            if slacks[row] > 1e-6 * scales[row]:
+                violations.setdefault(nutrient, {})[bound] = {
+                    "limit": float(limits[row]),
+                    "achievable": float(amounts[row]),
+                    "violation": float(slacks[row]),
+                }
+        energy_violation = slacks[n_rows] - slacks[n_rows + 1]
+        if abs(energy_violation) > 1e-6 * scales[-1]:
+            violations["Energ_Kcal"] = {
+                "target": {
+                    "limit": float(energy_target),
+                    "achievable": float((lp["A_eq"] @ x)[0]),
+                    "violation": float(energy_violation),
+                }
+            }
+
+        report = {"feasible": not violations, "violations": violations}
+        if iis and violations:
+            report["iis"] = self._irreducible_infeasible_subset(lp, constraints)
+        return report
+
+    def _irreducible_infeasible_subset(self, lp, constraints):
+        # deletion filter: drop every constraint whose removal keeps the
+        # rest infeasible; what remains is an irreducible infeasible subset
+        n_rows = len(constraints)
+        keep_rows = np.ones(n_rows, dtype=bool)
+        keep_energy = True
+
+        def feasible(rows, energy):
+            rows = np.flatnonzero(rows)
+            result = linprog(
+                np.zeros(len(self.food)),
+                A_ub=lp["A_ub"][rows] if len(rows) else None,
+                b_ub=lp["b_ub"][rows] if len(rows) else None,
+                A_eq=lp["A_eq"] if energy else None,
+                b_eq=lp["b_eq"] if energy else None,
+                bounds=lp["bounds"],
+                method="highs",
+            )
+            return result.status != 2
+
+        if not feasible(keep_rows, False):
+            keep_energy = False
+        for row in range(n_rows):
+            keep_rows[row] = False
+            if feasible(keep_rows, keep_energy):
+                keep_rows[row] = True
+
+        subset = [constraints[row] for row in np.flatnonzero(keep_rows)]
+        if keep_energy:
+            subset.append(("Energ_Kcal", "target"))
+        return subset
+
+    def build_deviation_lp(self, nutrient_ranges, prices=None, max_weights=None):
+        # variables: product amounts, then the excess and the shortfall of
+        # every bounded nutrient with respect to its optimal value
+        lp = self.build_lp(nutrient_ranges, prices=prices, max_weights=max_weights)
+        bounded_nutrients = _bounded_nutrients(nutrient_ranges)
+        n_bounded = len(bounded_nutrients)
+        ranges = np.array(
+            [nutrient_ranges[nutrient] for nutrient in bounded_nutrients]
+        ).reshape(-1, 5)
+        optimal_values = ranges[:, 2]
+        # relative deviation; nutrients whose optimum is 0 are scaled by max
+        scales = np.where(optimal_values > 0, optimal_values, ranges[:, 4])
+        identity = sparse.identity(n_bounded, format="csr")
+
+        return {
+            "c": lp["c"],
+            "deviation_c": np.concatenate(
+                [np.zeros(len(self.food)), 1 / scales, 1 / scales]
+            )
+            / n_bounded,
+            "A_ub": sparse.hstack(
+                [lp["A_ub"], sparse.csr_matrix((2 * n_bounded, 2 * n_bounded))],
+                format="csr",
+            ),
+            "b_ub": lp["b_ub"],
+            "A_eq": sparse.vstack(
+                [
+                    sparse.hstack([lp["A_eq"], sparse.csr_matrix((1, 2 * n_bounded))]),
+                    sparse.hstack([lp["A_ub"][n_bounded:], -identity, identity]),
+                ],
+                format="csr",
+            ),
+            "b_eq": np.concatenate([lp["b_eq"], optimal_values]),
+            "bounds": np.vstack(
+                [
+                    lp["bounds"],
+                    np.column_stack(
+                        [np.zeros(2 * n_bounded), np.full(2 * n_bounded, np.inf)]
+                    ),
+                ]
+            ),
+        }
+
+    def pareto_frontier(
+        self, nutrient_ranges, n_points=50, prices=None, max_weights=None
+    ):
+        deviation_lp = self.build_deviation_lp(
+            nutrient_ranges, prices=prices, max_weights=max_weights
+        )
+        n_products = len(self.food)
+        cost_c = np.concatenate(
+            [deviation_lp.pop("c"), np.zeros(len(deviation_lp["bounds"]) - n_products)]
+        )
+        deviation_c = deviation_lp.pop("deviation_c")
+
+        solver = _CostSolver(deviation_lp)
+
+        cheapest = solver.solve(cost_c)
+        if cheapest is None:
+            return "not success"
+        cost_scale = cost_c @ cheapest
+        if cost_scale <= 0:
+            cost_scale = 1
+
+        weights = np.linspace(0, 1, n_points)
+
+        def objective(weight):
+            # a tiny cost weight at weight=1 picks the cheapest of the
+            # closest diets
+            return max(1 - weight, 1e-6) * cost_c / cost_scale + weight * deviation_c
+
+        solutions = [None] * n_points
+        solved = np.zeros(n_points, dtype=bool)
+        # the cost-only optimum is also optimal at weight 0
+        solutions[0] = cheapest
+        solved[0] = True
+
+        def solve_point(point):
+            solutions[point] = solver.solve(objective(weights[point]))
+            solved[point] = True
+
+        # The objective is affine in the weight, so a point optimal at both
+        # ends of an interval is optimal everywhere inside it. Cold solves
+        # bisect the sweep and skip such intervals; warm solves only change
+        # the costs, so they walk the grid in order, each starting from the
+        # previous basis.
+        def sweep(left, right):
+            if right - left < 2:
+                return
+            x_left, x_right = solutions[left], solutions[right]
+            if x_left is not None and x_right is not None:
+                c_left, c_right = objective(weights[left]), objective(weights[right])
+                if c_left @ x_right <= c_left @ x_left + 1e-9 * abs(
+                    c_left @ x_left
+                ) and c_right @ x_left <= c_right @ x_right + 1e-9 * abs(
+                    c_right @ x_right
+                ):
+                    solutions[left + 1 : right] = [x_left] * (right - left - 1)
+                    return
+            middle = (left + right) // 2
+            solve_point(middle)
+            sweep(left, middle)
+            sweep(middle, right)
+
+        if solver.warm:
+            for point in range(1, n_points):
+                solve_point(point)
+        elif n_points > 1:
+            solve_point(n_points - 1)
+            sweep(0, n_points - 1)
+
+        rows = []
+        for point, x in enumerate(solutions):
+            if x is None:
+                continue
+            rows.append(
+                {
+                    "weight": weights[point],
+                    "cost": float(cost_c @ x),
+                    "deviation": float(deviation_c @ x),
+                    "n_products": int(np.sum(x[:n_products] * 100 > 1e-6)),
+                    "solved": bool(solved[point]),
+                    "diet": self.diet_from_weights(x[:n_products]),
+                }
+            )
+        return pd.DataFrame(rows)
+
+    def diet_from_weights(self, x):
+        product_weights = x * 100
+        optimal_diet = {}
+
+        for i in range(len(self.food)):
+            if product_weights[i] > 1e-6:
+                optimal_diet[self.food.names[i]] = product_weights[i]
+
+        return optimal_diet
+
+    def build_packs_milp(self, nutrient_ranges, prices=None, max_weights=None):
+        # variables: eaten amount of every product (100 g units) followed by
+        # the number of bought packs of every product sold by the piece
+        # ("шт" price unit), which cost their item price; `prices` only
+        # overrides the 100 g prices of loose products
+        lp = self.build_lp(nutrient_ranges, prices=prices, max_weights=max_weights)
+        n_products = len(self.food)
+        pack_weights = self.food.weights
+        packed = np.flatnonzero(
+            ~np.isnan(self.food.item_prices)
+            & ~np.isnan(pack_weights)
+            & (pack_weights > 0)
+        )
+        n_packed = len(packed)
+
+        pack_prices = self.food.item_prices[packed]
+        c = np.concatenate([lp["c"], pack_prices])
+        c[packed] = 0
+
+        eaten_in_packs = sparse.csr_matrix(
+            (np.full(n_packed, 100.0), (np.arange(n_packed), packed)),
+            shape=(n_packed, n_products),
+        )
+        A = sparse.vstack(
+            [
+                sparse.hstack(
+                    [lp["A_ub"], sparse.csr_matrix((lp["A_ub"].shape[0], n_packed))]
+                ),
+                sparse.hstack([lp["A_eq"], sparse.csr_matrix((1, n_packed))]),
+                sparse.hstack([eaten_in_packs, -sparse.diags(pack_weights[packed])]),
+            ],
+            format="csr",
+        )
+        constraint_lb = np.concatenate(
+            [np.full(len(lp["b_ub"]), -np.inf), lp["b_eq"], np.full(n_packed, -np.inf)]
+        )
+        constraint_ub = np.concatenate([lp["b_ub"], lp["b_eq"], np.zeros(n_packed)])
+
+        max_packs = np.ceil(lp["bounds"][packed, 1] * 100 / pack_weights[packed])
+        lower_bounds = np.zeros(n_products + n_packed)
+        upper_bounds = np.concatenate([lp["bounds"][:, 1], max_packs])
+        integrality = np.concatenate([np.zeros(n_products), np.ones(n_packed)])
+
+        return {
+            "c": c,
+            "integrality": integrality,
+            "bounds": Bounds(lower_bounds, upper_bounds),
+            "constraints": LinearConstraint(A, constraint_lb, constraint_ub),
+        }, packed
+
+    def solve_packs(
+        self,
+        nutrient_ranges,
+        prices=None,
+        max_weights=None,
+        time_limit=10,
+        mip_rel_gap=1e-3,
+    ):
+        milp_problem, packed = self.build_packs_milp(
+            nutrient_ranges, prices=prices, max_weights=max_weights
+        )
+        result = milp(
+            **milp_problem,
+            options={"time_limit": time_limit, "mip_rel_gap": mip_rel_gap},
+        )
+        c = milp_problem["c"]
+
+        if result.status == 0:
+            return self._purchase(c, result.x, packed, "milp")
+
+        # time budget exceeded: round up the LP relaxation and keep whichever
+        # purchase is cheaper than the MILP incumbent, if there is one
+        lp_result = self.solve_lp(
+            nutrient_ranges, prices=prices, max_weights=max_weights
+        )
+        if not lp_result.success:
+            return "not success"
+        packs = np.ceil(lp_result.x[packed] * 100 / self.food.weights[packed] - 1e-9)
+        purchase = self._purchase(
+            c, np.concatenate([lp_result.x, packs]), packed, "lp-rounding"
+        )
+        if result.x is not None and result.fun < purchase["cost"]:
+            return self._purchase(c, result.x, packed, "milp-incumbent")
+        return purchase
+
+    def _purchase(self, c, z, packed, method):
+        n_products = len(self.food)
+        packs = np.round(z[n_products:])
+        return {
+            "diet": self.diet_from_weights(z[:n_products]),
+            "packs": {
+                self.food.names[i]: int(n_packs)
+                for i, n_packs in zip(packed, packs)
+                if n_packs > 0
+            },
+            "cost": float(c[:n_products] @ z[:n_products] + c[n_products:] @ packs),
+            "method": method,
+        }
+
+
+def build_diet_lp(food, nutrient_ranges):
+    return DietModel(food).build_lp(nutrient_ranges)
 
-    A_eq = np.zeros((1, n_products))
-    A_eq[0, :] = [nutrients_dict["Energ_Kcal"] for nutrients_dict in product_nutrients]
-    b_eq = np.array([nutrient_ranges["Energ_Kcal"][2]])
 
-    A_ub = []
-    b_ub = []
-
-    for nutrient, values in nutrient_ranges.items():
-        if nutrient != "Energ_Kcal":
-            min_value = values[1]
-            optimal_value = values[2]
-            max_value = values[4]
-
-            lower_bound_row = np.zeros(n_products)
-            upper_bound_row = np.zeros(n_products)
-
-            for i in range(n_products):
-                if nutrient in product_nutrients[i]:
-                    lower_bound_row[i] = -product_nutrients[i][nutrient]
-                    upper_bound_row[i] = product_nutrients[i][nutrient]
-
-            A_ub.append(lower_bound_row)
-            A_ub.append(upper_bound_row)
-            b_ub.append(-min_value)
-            b_ub.append(max_value)
-
-    for i in range(n_products):
-        weight_constraint_row = np.zeros(n_products)
-        weight_constraint_row[i] = 1
-        A_ub.append(weight_constraint_row)
-        b_ub.append(max_weights[i])
-
-    A_ub = np.array(A_ub)
-    b_ub = np.array(b_ub)
-
-    result = linprog(c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, method="highs")
+def get_optimal_diet(filtered_data, nutrient_ranges):
+    return DietModel.from_dict(filtered_data).solve(nutrient_ranges)
 
-    if not result.success:
-        return "not success"
 
-    product_weights = result.x * 100
-    optimal_diet = {}
+def get_optimal_purchase(filtered_data, nutrient_ranges, time_limit=10):
+    return DietModel.from_dict(filtered_data).solve_packs(
+        nutrient_ranges, time_limit=time_limit
+    )
 
-    for i in range(n_products):
-        if product_weights[i] > 1e-6:
-            optimal_diet[product_names[i]] = product_weights[i]
 
-    return optimal_diet
+if __name__ == "__main__":
+    # food = open_food_database('D:/YandexDisk/food/code/food_database.json')
+    food = open_food_database("D:/YandexDisk/food/code/opt_data.json")
+    food = food.subset(food.select(NUTRIENT_KEYS, has_price=True))
 
+    nutrient_ranges = calculate_nutrient_ranges(
+        gender="female",
+        height=1.7,
+        weight_cur=64,
+        age=32,
+        activity_multiplier=1.375,
+        breastfeeding=True,
+    )
 
-optimal_diet = get_optimal_diet(filtered_data, nutrient_ranges)
-print(optimal_diet)
+    optimal_diet = DietModel(food).solve(nutrient_ranges)
+    print(optimal_diet)
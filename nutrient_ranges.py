@@ -6,8 +6,33 @@
 # 'extra_active': 1.9
 """
 
+from functools import lru_cache
+
 import numpy as np
 
+NUTRIENT_RANGES_CACHE_SIZE = 1024
+
+
+# Mifflin-St Jeor offsets and Harris-Benedict coefficients (constant,
+# weight, height, age) by gender
+MIFFLIN_ST_JEOR_OFFSETS = {"male": 5, "female": -161}
+HARRIS_BENEDICT_COEFFICIENTS = {
+    "male": (88.362, 13.397, 4.799, 5.677),
+    "female": (447.593, 9.247, 3.098, 4.330),
+}
+
+
+def _is_male(gender):
+    # gender may be a string or an array of them, in any case
+    gender = np.char.lower(np.asarray(gender, dtype=str))
+    if not np.isin(gender, ["male", "female"]).all():
+        raise ValueError("Invalid gender specified. Use 'male' or 'female'.")
+    return gender == "male"
+
+
+def _by_gender(male, table):
+    return np.where(male, table["male"], table["female"])
+
 
 def calculate_calories(
     gender,
@@ -19,69 +44,90 @@ def calculate_calories(
     breastfeeding=False,
     formula="mifflin_st_jeor",
 ):
-    def mifflin_st_jeor(gender, weight, height, age):
-        if gender == "male":
-            bmr = (10 * weight) + (6.25 * height) - (5 * age) + 5
-        elif gender == "female":
-            bmr = (10 * weight) + (6.25 * height) - (5 * age) - 161
-        else:
-            raise ValueError("Invalid gender specified. Use 'male' or 'female'.")
-        return bmr
-
-    def harris_benedict_formula(gender, weight, height, age):
-        if gender == "male":
-            bmr = 88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age)
-        elif gender == "female":
-            bmr = 447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
-        else:
-            raise ValueError("Invalid gender specified. Use 'male' or 'female'.")
-        return bmr
+    # works on scalars and on arrays of profiles alike
+    male = _is_male(gender)
+
+    def mifflin_st_jeor(weight):
+        offset = _by_gender(male, MIFFLIN_ST_JEOR_OFFSETS)
+        return (10 * weight) + (6.25 * height) - (5 * age) + offset
+
+    def harris_benedict_formula(weight):
+        constant, per_weight, per_height, per_age = (
+            np.where(male, male_coefficient, female_coefficient)
+            for male_coefficient, female_coefficient in zip(
+                HARRIS_BENEDICT_COEFFICIENTS["male"],
+                HARRIS_BENEDICT_COEFFICIENTS["female"],
+            )
+        )
+        return (
+            constant + (per_weight * weight) + (per_height * height) - (per_age * age)
+        )
 
     if formula == "mifflin_st_jeor":
-        bmr_current = mifflin_st_jeor(gender, current_weight, height, age)
-        bmr_goal = mifflin_st_jeor(gender, goal_weight, height, age)
+        bmr_current = mifflin_st_jeor(current_weight)
+        bmr_goal = mifflin_st_jeor(goal_weight)
     elif formula == "harris_benedict":
-        bmr_current = harris_benedict_formula(gender, current_weight, height, age)
-        bmr_goal = harris_benedict_formula(gender, goal_weight, height, age)
+        bmr_current = harris_benedict_formula(current_weight)
+        bmr_goal = harris_benedict_formula(goal_weight)
     else:
         raise ValueError(
             "Invalid formula specified. Use 'mifflin_st_jeor' or 'harris_benedict'."
         )
 
+    breastfeeding = np.asarray(breastfeeding, dtype=bool)
     calories_current_maintenance = (
         bmr_current * activity_multiplier + breastfeeding * 500
     )
     calories_goal_maintenance = bmr_goal * activity_multiplier + breastfeeding * 500
-    if breastfeeding:
-        calories_weight_loss = calories_current_maintenance - 400
-    else:
-        calories_weight_loss = calories_current_maintenance - 500
+    calories_weight_loss = calories_current_maintenance - np.where(
+        breastfeeding, 400, 500
+    )
 
-    excess_weight = current_weight - goal_weight
+    excess_weight = np.asarray(current_weight - goal_weight)
 
     max_excess_weight = 2
-    if excess_weight >= max_excess_weight:
-        calories_recomendations = calories_weight_loss
-    elif excess_weight <= 0:
-        calories_recomendations = calories_goal_maintenance
-    else:
-        interpolation_coefficient = excess_weight / max_excess_weight
-        calories_recomendations = (
+    interpolation_coefficient = excess_weight / max_excess_weight
+    calories_recomendations = np.where(
+        excess_weight >= max_excess_weight,
+        calories_weight_loss,
+        np.where(
+            excess_weight <= 0,
+            calories_goal_maintenance,
             calories_goal_maintenance
             + interpolation_coefficient
-            * (calories_weight_loss - calories_goal_maintenance)
-        )
+            * (calories_weight_loss - calories_goal_maintenance),
+        ),
+    )
 
     return {
-        "kcal_current_maintenance": calories_current_maintenance,
-        "kcal_goal_maintenance": calories_goal_maintenance,
-        "kcal_weight_loss": calories_weight_loss,
-        "kcal_recomendations": calories_recomendations,
+        "kcal_current_maintenance": calories_current_maintenance[()],
+        "kcal_goal_maintenance": calories_goal_maintenance[()],
+        "kcal_weight_loss": calories_weight_loss[()],
+        "kcal_recomendations": calories_recomendations[()],
     }
 
 
 def calculate_nutrient_ranges(
     gender, height, weight_cur, age, activity_multiplier, breastfeeding=False
+):
+    # the cached ranges are shared between callers: the arrays are
+    # read-only and every caller gets its own dict. The key is the
+    # normalized profile, so "Male" and "male" share one entry.
+    return dict(
+        _cached_nutrient_ranges(
+            gender.lower(),
+            float(height),
+            float(weight_cur),
+            float(age),
+            float(activity_multiplier),
+            bool(breastfeeding),
+        )
+    )
+
+
+@lru_cache(maxsize=NUTRIENT_RANGES_CACHE_SIZE)
+def _cached_nutrient_ranges(
+    gender, height, weight_cur, age, activity_multiplier, breastfeeding
 ):
     params = {}
     optimal_bmi = get_optimal_bmi(gender)
@@ -115,75 +161,95 @@ def calculate_nutrient_ranges(
 
     update_vitamins_and_minerals(params, gender, breastfeeding)
 
-    return params
+    return _read_only(params)
+
+
+def _read_only(table):
+    for values in table.values():
+        if values is not None:
+            values.setflags(write=False)
+    return table
+
+
+OPTIMAL_BMI = {"male": 22.5, "female": 21.5}
+FIBER_RANGES = {
+    "male": np.array([25, 30, 38, 45, 70]),
+    "female": np.array([20, 21, 25, 35, 65]),
+}
+ENERGY_OFFSETS = np.array([-200, -100, 0, 100, 200])
+PROTEIN_PER_KG = np.array([0.83, 1.2, 1.4, 1.6, 2])
+LIPID_ENERGY_SHARES = np.array([0.2, 0.25, 0.275, 0.275, 0.3])
+CARBOHYDRATE_ENERGY_SHARES = (0.45, 0.6, 0.65)
+MIN_CARBOHYDRATE = 130
+SATURATED_FAT_ENERGY_SHARES = (0.05, 0.1)
+VEGETABLES_FRUITS_RANGE = np.array([400, 400, 800, 1000, 1200])
+for _range in (
+    *FIBER_RANGES.values(),
+    ENERGY_OFFSETS,
+    PROTEIN_PER_KG,
+    LIPID_ENERGY_SHARES,
+    VEGETABLES_FRUITS_RANGE,
+):
+    _range.setflags(write=False)
+
+
+def _ranges(*columns):
+    # the five columns of a range; scalars give a (5,) array, arrays of
+    # profiles a (profiles x 5) one
+    return np.stack(np.broadcast_arrays(*columns), axis=-1).astype(float)
 
 
 def get_optimal_bmi(gender):
     if gender.lower() == "male":
-        return 22.5
+        return OPTIMAL_BMI["male"]
     elif gender.lower() == "female":
-        return 21.5
+        return OPTIMAL_BMI["female"]
     else:
         return 22
 
 
 def get_bmi_range(height, optimal_bmi):
-    return np.array([18.5, optimal_bmi - 1, optimal_bmi, optimal_bmi + 1, 25])
+    return _ranges(18.5, optimal_bmi - 1, optimal_bmi, optimal_bmi + 1, 25)
 
 
 def get_fiber_range(gender):
     if gender.lower() == "male":
-        return np.array([25, 30, 38, 45, 70])
+        return FIBER_RANGES["male"].copy()
     elif gender.lower() == "female":
-        return np.array([20, 21, 25, 35, 65])
+        return FIBER_RANGES["female"].copy()
 
 
 def get_protein_range(weight_cur):
-    return np.array([0.83, 1.2, 1.4, 1.6, 2]) * weight_cur
+    return PROTEIN_PER_KG * np.asarray(weight_cur)[..., None]
 
 
 def get_lipid_range(kcal_current_maintenance, kcal_recomendations):
-    return (
-        np.array(
-            [
-                0.2 * kcal_recomendations,
-                0.25 * kcal_recomendations,
-                0.275 * kcal_recomendations,
-                0.275 * kcal_recomendations,
-                0.3 * kcal_recomendations,
-            ]
-        )
-        / 9
-    )
+    return LIPID_ENERGY_SHARES * np.asarray(kcal_recomendations)[..., None] / 9
 
 
 def get_carbohydrate_range(kcal_recomendations, protein, lipid):
-    return np.array(
-        [
-            130,
-            0.45 * kcal_recomendations / 4,
-            (kcal_recomendations - protein * 4 - lipid * 9) / 4,
-            0.6 * kcal_recomendations / 4,
-            0.65 * kcal_recomendations / 4,
-        ]
+    low, high, max_share = CARBOHYDRATE_ENERGY_SHARES
+    return _ranges(
+        MIN_CARBOHYDRATE,
+        low * kcal_recomendations / 4,
+        (kcal_recomendations - protein * 4 - lipid * 9) / 4,
+        high * kcal_recomendations / 4,
+        max_share * kcal_recomendations / 4,
     )
 
 
 def get_energy_range(kcal_recomendations):
-    return np.array(
-        [
-            kcal_recomendations - 200,
-            kcal_recomendations - 100,
-            kcal_recomendations,
-            kcal_recomendations + 100,
-            kcal_recomendations + 200,
-        ]
-    )
+    return np.asarray(kcal_recomendations)[..., None] + ENERGY_OFFSETS
 
 
 def get_saturated_fat_range(kcal_recomendations):
-    return np.array(
-        [0, 0, 0, 0.05 * kcal_recomendations / 9, 0.1 * kcal_recomendations / 9]
+    high, max_share = SATURATED_FAT_ENERGY_SHARES
+    return _ranges(
+        0,
+        0,
+        0,
+        high * kcal_recomendations / 9,
+        max_share * kcal_recomendations / 9,
     )
 
 
@@ -194,40 +260,43 @@ def get_sugar_range(kcal_recomendations):
 
 
 def get_vegetable_fruits_range():
-    return np.array([400, 400, 800, 1000, 1200])
+    return VEGETABLES_FRUITS_RANGE.copy()
+
+
+MALE_VITAMINS_AND_MINERALS = _read_only(
+    {
+        "Calcium_(mg)": np.array([800, 1000, 1200, 2000, 2500]),
+        "Iron_(mg)": np.array([8, 10, 11, 18, 45]),
+        "Magnesium_(mg)": np.array([400, 420, 500, 600, 700]),
+        "Phosphorus_(mg)": np.array([800, 1000, 1200, 2500, 4000]),
+        "Potassium_(mg)": np.array([2500, 3000, 3400, 5000, 10000]),
+        "Sodium_(mg)": np.array([1300, 1500, 1750, 2000, 2300]),
+        "Zinc_(mg)": np.array([11, 12, 15, 25, 40]),
+        "Copper_mg)": np.array([0.9, 1, 1.5, 3, 10]),
+        "Manganese_(mg)": np.array([2.3, 2.3, 2.3, 5, 11]),
+        "Selenium_(µg)": np.array([70, 70, 70, 300, 400]),
+        "Vit_C_(mg)": np.array([90, 120, 150, 500, 2000]),
+        "Thiamin_(mg)": np.array([1.2, 1.6, 2, 5, 10]),
+        "Riboflavin_(mg)": np.array([1.3, 1.8, 2, 5, 10]),
+        "Niacin_(mg)": np.array([16, 20, 28, 35, 60]),
+        "Panto_Acid_mg)": np.array([5, 5, 5, 10, 20]),
+        "Vit_B6_(mg)": np.array([1.3, 2, 2, 25, 100]),
+        "Folate_Tot_(µg)": np.array([400, 400, 400, 800, 1000]),
+        "Choline_Tot_ (mg)": np.array([550, 550, 750, 1000, 3500]),
+        "Vit_B12_(µg)": np.array([2.4, 3, 3, 10, 20]),
+        "Vit_A_RAE": np.array([900, 1300, 1500, 2000, 3000]),
+        "Vit_E_(mg)": np.array([15, 15, 15, 300, 1000]),
+        "Vit_D_µg": np.array([10, 15, 40, 50, 100]),
+        "Vit_K_(µg)": np.array([120, 200, 250, 300, 500]),
+    }
+)
 
 
 def update_vitamins_and_minerals(params, gender, breastfeeding):
     if gender.lower() == "male":
-        male_vitamins_and_minerals = {
-            "Calcium_(mg)": np.array([800, 1000, 1200, 2000, 2500]),
-            "Iron_(mg)": np.array([8, 10, 11, 18, 45]),
-            "Magnesium_(mg)": np.array([400, 420, 500, 600, 700]),
-            "Phosphorus_(mg)": np.array([800, 1000, 1200, 2500, 4000]),
-            "Potassium_(mg)": np.array([2500, 3000, 3400, 5000, 10000]),
-            "Sodium_(mg)": np.array([1300, 1500, 1750, 2000, 2300]),
-            "Zinc_(mg)": np.array([11, 12, 15, 25, 40]),
-            "Copper_mg)": np.array([0.9, 1, 1.5, 3, 10]),
-            "Manganese_(mg)": np.array([2.3, 2.3, 2.3, 5, 11]),
-            "Selenium_(µg)": np.array([70, 70, 70, 300, 400]),
-            "Vit_C_(mg)": np.array([90, 120, 150, 500, 2000]),
-            "Thiamin_(mg)": np.array([1.2, 1.6, 2, 5, 10]),
-            "Riboflavin_(mg)": np.array([1.3, 1.8, 2, 5, 10]),
-            "Niacin_(mg)": np.array([16, 20, 28, 35, 60]),
-            "Panto_Acid_mg)": np.array([5, 5, 5, 10, 20]),
-            "Vit_B6_(mg)": np.array([1.3, 2, 2, 25, 100]),
-            "Folate_Tot_(µg)": np.array([400, 400, 400, 800, 1000]),
-            "Choline_Tot_ (mg)": np.array([550, 550, 750, 1000, 3500]),
-            "Vit_B12_(µg)": np.array([2.4, 3, 3, 10, 20]),
-            "Vit_A_RAE": np.array([900, 1300, 1500, 2000, 3000]),
-            "Vit_E_(mg)": np.array([15, 15, 15, 300, 1000]),
-            "Vit_D_µg": np.array([10, 15, 40, 50, 100]),
-            "Vit_K_(µg)": np.array([120, 200, 250, 300, 500]),
-        }
-        params.update(male_vitamins_and_minerals)
+        params.update(MALE_VITAMINS_AND_MINERALS)
     elif gender.lower() == "female":
-        female_vitamins_and_minerals = get_female_vitamins_and_minerals(breastfeeding)
-        params.update(female_vitamins_and_minerals)
+        params.update(FEMALE_VITAMINS_AND_MINERALS[bool(breastfeeding)])
 
 
 def get_female_vitamins_and_minerals(breastfeeding):
@@ -383,3 +452,82 @@ def get_female_vitamins_and_minerals(breastfeeding):
         "Vit_D_IU": np.array([10, 15, 40, 50, 100]) * 40,
         "Vit_K_(µg)": np.array([120, 200, 250, 500, 1000]),
     }
+
+
+FEMALE_VITAMINS_AND_MINERALS = {
+    breastfeeding: _read_only(get_female_vitamins_and_minerals(breastfeeding))
+    for breastfeeding in (False, True)
+}
+
+RANGE_NUTRIENTS = [
+    "Energ_Kcal",
+    "Protein_(g)",
+    "Lipid_Tot_(g)",
+    "Carbohydrt_(g)",
+    "vegetables_fruits",
+    "FA_Sat_(g)",
+    "Fiber_TD_(g)",
+    *FEMALE_VITAMINS_AND_MINERALS[False],
+]
+
+# (nutrients x 5) tables for male, female, breastfeeding female; nutrients
+# missing for a group are NaN
+_VITAMIN_TABLES = np.array(
+    [
+        [table.get(nutrient, np.full(5, np.nan)) for nutrient in RANGE_NUTRIENTS[7:]]
+        for table in (
+            MALE_VITAMINS_AND_MINERALS,
+            FEMALE_VITAMINS_AND_MINERALS[False],
+            FEMALE_VITAMINS_AND_MINERALS[True],
+        )
+    ],
+    dtype=float,
+)
+_VITAMIN_TABLES.setflags(write=False)
+
+
+def calculate_nutrient_ranges_batch(
+    gender, height, weight_cur, age, activity_multiplier, breastfeeding=False
+):
+    # calculate_nutrient_ranges for arrays of profiles (scalars broadcast);
+    # returns a (profiles x RANGE_NUTRIENTS x 5) array
+    male = _is_male(np.atleast_1d(gender))
+    male, height, weight_cur, age, activity_multiplier, breastfeeding = (
+        np.broadcast_arrays(
+            male,
+            np.atleast_1d(np.asarray(height, dtype=float)),
+            np.atleast_1d(np.asarray(weight_cur, dtype=float)),
+            np.atleast_1d(np.asarray(age, dtype=float)),
+            np.atleast_1d(np.asarray(activity_multiplier, dtype=float)),
+            np.atleast_1d(np.asarray(breastfeeding, dtype=bool)),
+        )
+    )
+    gender = np.where(male, "male", "female")
+
+    optimal_weight = _by_gender(male, OPTIMAL_BMI) * height**2
+    calories = calculate_calories(
+        gender,
+        weight_cur,
+        optimal_weight,
+        height * 100,
+        age,
+        activity_multiplier,
+        breastfeeding=breastfeeding,
+    )
+    kcal_recomendations = calories["kcal_recomendations"]
+
+    ranges = np.empty((len(male), len(RANGE_NUTRIENTS), 5))
+    ranges[:, 0] = get_energy_range(kcal_recomendations)
+    ranges[:, 1] = get_protein_range(weight_cur)
+    ranges[:, 2] = get_lipid_range(
+        calories["kcal_current_maintenance"], kcal_recomendations
+    )
+    ranges[:, 3] = get_carbohydrate_range(
+        kcal_recomendations, ranges[:, 1, 2], ranges[:, 2, 2]
+    )
+    ranges[:, 4] = VEGETABLES_FRUITS_RANGE
+    ranges[:, 5] = get_saturated_fat_range(kcal_recomendations)
+    ranges[:, 6] = _by_gender(male[:, None], FIBER_RANGES)
+    group = np.where(male, 0, 1 + breastfeeding)
+    ranges[:, 7:] = _VITAMIN_TABLES[group]
+    return ranges
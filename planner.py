@@ -1,77 +1,107 @@
 import tkinter as tk
 from tkinter import filedialog, ttk
 
-import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
 
 from AutocompleteWidget import AutocompleteEntry
-from data import compute_data_dict, load_json, save_json
+from data import load_json, save_json
+from dishes import RationTotals, compute_dishes
+from food_matrix import open_food_database
 from nutrient_ranges import calculate_nutrient_ranges
-
-
-def plot_ration_nutrients(nutrient_ranges, ration_nutrients, title=""):
-    fig = plt.figure(figsize=(12, 24))
-    num_bars = len(nutrient_ranges)
-    bar_height = 0.5
-    ind = np.arange(num_bars)
-    colors = ["red", "orange", "green", "orange", "red"]
-    bar_colors = ["red", "orange", "green", "green", "orange", "red"]
-
-    for nutrient_idx, nutrient in enumerate(nutrient_ranges):
-        normalized_nutrient_values = [
-            value / max(nutrient_ranges[nutrient])
-            for value in nutrient_ranges[nutrient]
-        ]
-        normalized_current_value = min(
-            ration_nutrients.get(nutrient, 0) / max(nutrient_ranges[nutrient]), 1
-        )
-        range_idx = np.searchsorted(
-            nutrient_ranges[nutrient], ration_nutrients.get(nutrient, 0)
-        )
-        bar_color = bar_colors[range_idx]
-        plt.barh(
-            num_bars - 1 - ind[nutrient_idx],
-            normalized_current_value,
-            height=bar_height,
-            color=bar_color,
-            alpha=0.8,
-            label=nutrient,
-        )
-
-        for i, value in enumerate(normalized_nutrient_values):
-            plt.plot(
-                [value, value],
-                [
-                    num_bars - 1 - ind[nutrient_idx] - 0.5 * bar_height,
-                    num_bars - 1 - ind[nutrient_idx] + 0.5 * bar_height,
-                ],
-                color=colors[i],
-                linestyle="--",
-                linewidth=1.5,
+from search_index import NameSearchIndex
+
+DATABASE_PATH = "C:/yd/food/code/food_database.json"
+
+
+RANGE_COLORS = ["red", "orange", "green", "orange", "red"]
+BAR_COLORS = ["red", "orange", "green", "green", "orange", "red"]
+BAR_HEIGHT = 0.5
+
+
+class NutrientChart:
+    # The ration chart drawn once per list of nutrients: later updates move
+    # and relabel the existing artists instead of rebuilding the figure.
+    def __init__(self, figure=None):
+        self.figure = figure or Figure(figsize=(12, 24))
+        self.ax = self.figure.add_subplot()
+        self.nutrients = None
+
+    def _build(self, nutrients):
+        self.ax.clear()
+        self.nutrients = nutrients
+        self.bars = []
+        self.range_lines = []
+        self.range_labels = []
+        self.value_labels = []
+        num_bars = len(nutrients)
+        for nutrient_idx, nutrient in enumerate(nutrients):
+            y = num_bars - 1 - nutrient_idx
+            self.bars.append(
+                self.ax.barh(y, 0, height=BAR_HEIGHT, alpha=0.8, label=nutrient)[0]
             )
-            plt.text(
-                value,
-                num_bars - 1 - ind[nutrient_idx] + 0.55 * bar_height,
-                f"{nutrient_ranges[nutrient][i]:.1f}",
-                fontsize=9,
-                color=colors[i],
+            lines = []
+            labels = []
+            for color in RANGE_COLORS:
+                lines.append(
+                    self.ax.plot(
+                        [0, 0],
+                        [y - 0.5 * BAR_HEIGHT, y + 0.5 * BAR_HEIGHT],
+                        color=color,
+                        linestyle="--",
+                        linewidth=1.5,
+                    )[0]
+                )
+                labels.append(
+                    self.ax.text(0, y + 0.55 * BAR_HEIGHT, "", fontsize=9, color=color)
+                )
+            self.range_lines.append(lines)
+            self.range_labels.append(labels)
+            self.value_labels.append(
+                self.ax.text(
+                    0.01,
+                    -0.1 + y,
+                    "",
+                    fontsize=10,
+                    color="black",
+                    bbox=dict(facecolor="white", edgecolor="none", pad=1),
+                )
             )
+        self.ax.set_yticks(np.arange(num_bars)[::-1], nutrients)
+        self.ax.set_xlabel("Normalized Values")
+        self.ax.set_ylabel("Nutrients")
+
+    def update(self, nutrient_ranges, ration_nutrients, title=""):
+        nutrients = list(nutrient_ranges)
+        if nutrients != self.nutrients:
+            self._build(nutrients)
+
+        for nutrient_idx, nutrient in enumerate(nutrients):
+            ranges = nutrient_ranges[nutrient]
+            max_range = max(ranges)
+            current_value = ration_nutrients.get(nutrient, 0)
+            bar = self.bars[nutrient_idx]
+            bar.set_width(min(current_value / max_range, 1))
+            bar.set_color(BAR_COLORS[np.searchsorted(ranges, current_value)])
+            for i, value in enumerate(ranges):
+                self.range_lines[nutrient_idx][i].set_xdata(
+                    [value / max_range, value / max_range]
+                )
+                label = self.range_labels[nutrient_idx][i]
+                label.set_x(value / max_range)
+                label.set_text(f"{value:.1f}")
+            self.value_labels[nutrient_idx].set_text(f"{current_value:.1f}")
+
+        self.ax.set_title(title)
+        self.ax.relim()
+        self.ax.autoscale_view()
 
-        plt.text(
-            0.01,
-            -0.1 + num_bars - 1 - ind[nutrient_idx],
-            f"{ration_nutrients.get(nutrient, 0):.1f}",
-            fontsize=10,
-            color="black",
-            bbox=dict(facecolor="white", edgecolor="none", pad=1),
-        )
 
-    plt.yticks(num_bars - 1 - ind, nutrient_ranges.keys())
-    plt.xlabel("Normalized Values")
-    plt.ylabel("Nutrients")
-    plt.title(title)
-    return fig
+def plot_ration_nutrients(nutrient_ranges, ration_nutrients, title=""):
+    chart = NutrientChart()
+    chart.update(nutrient_ranges, ration_nutrients, title)
+    return chart.figure
 
 
 class DishWeightEntry(tk.Frame):
@@ -80,19 +110,28 @@ class DishWeightEntry(tk.Frame):
         autocomplete_list,
         remove_callback,
         disable_autocomplete=False,
+        change_callback=None,
         *args,
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
 
         self.dish_entry = AutocompleteEntry(
-            autocomplete_list, disable_autocomplete=disable_autocomplete, master=self
+            autocomplete_list,
+            disable_autocomplete=disable_autocomplete,
+            fuzzy=True,
+            master=self,
         )
         self.dish_entry.grid(row=0, column=0)
 
-        self.weight_entry = tk.Entry(self, width=10)
+        self.weight_var = tk.StringVar(self)
+        self.weight_entry = tk.Entry(self, width=10, textvariable=self.weight_var)
         self.weight_entry.grid(row=0, column=1)
 
+        if change_callback is not None:
+            for var in (self.dish_entry.var, self.weight_var):
+                var.trace_add("write", lambda *args: change_callback(self))
+
         self.remove_button = tk.Button(
             self, text="X", command=lambda: remove_callback(self)
         )
@@ -103,13 +142,13 @@ class App(tk.Tk):
     def __init__(self):
         super().__init__()
 
-        self.data = load_json("C:/yd/food/code/food_database.json")
+        self.dish_weight_entries = []
+        self._live_plot_id = None
+        self.load_database()
 
         self.title("Nutrient Ration Planner")
         self.geometry("1600x900")
 
-        self.dish_weight_entries = []
-
         self.left_frame = tk.Frame(self)
         self.left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
 
@@ -120,6 +159,19 @@ class App(tk.Tk):
         self.add_dish_field()
         self.canvas = None
 
+    def load_database(self):
+        self.food = open_food_database(DATABASE_PATH)
+        self._name_index = None
+        self.ration_totals = RationTotals(self.food)
+        for dish_weight_entry in self.dish_weight_entries:
+            self.update_ration_totals(dish_weight_entry)
+
+    def name_index(self):
+        # one index for every dish entry, built on the first keystroke
+        if self._name_index is None:
+            self._name_index = NameSearchIndex(self.food.names)
+        return self._name_index
+
     def create_widgets(self):
         self.save_physiological_params_button = tk.Button(
             self.left_frame,
@@ -189,6 +241,11 @@ class App(tk.Tk):
         )
         self.export_button.pack()
 
+        self.reload_button = tk.Button(
+            self.left_frame, text="Reload Database", command=self.load_database
+        )
+        self.reload_button.pack()
+
         self.add_dish_button = tk.Button(
             self.left_frame, text="Add Dish", command=self.add_dish_field
         )
@@ -199,6 +256,15 @@ class App(tk.Tk):
         )
         self.plot_button.pack()
 
+        self.live_plot_var = tk.BooleanVar(self, value=False)
+        self.live_plot_check = ttk.Checkbutton(
+            self.left_frame,
+            text="Live Plot",
+            variable=self.live_plot_var,
+            command=self.schedule_live_plot,
+        )
+        self.live_plot_check.pack()
+
     def save_physiological_params(self):
         file_path = filedialog.asksaveasfilename(
             defaultextension=".json",
@@ -234,18 +300,20 @@ class App(tk.Tk):
         self.activity_multiplier_var.set(physiological_params["activity_multiplier"])
         self.breastfeeding_var.set(physiological_params["breastfeeding"])
 
-    def draw_plot(self, fig):
-        if self.canvas:
-            self.canvas.get_tk_widget().pack_forget()
-
-        self.canvas = FigureCanvasTkAgg(fig, master=self.right_frame)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True)
+    def draw_plot(self, nutrient_ranges, nutrients_total):
+        # one chart and one canvas for the lifetime of the window
+        if self.canvas is None:
+            self.chart = NutrientChart()
+            self.canvas = FigureCanvasTkAgg(self.chart.figure, master=self.right_frame)
+            self.canvas.get_tk_widget().pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True)
+        self.chart.update(nutrient_ranges, nutrients_total, title=None)
+        self.canvas.draw_idle()
 
     def add_dish_field(self):
         dish_weight_entry = DishWeightEntry(
-            list(self.data.keys()),
+            self.name_index,
             remove_callback=self.remove_dish_field,
+            change_callback=self.update_ration_totals,
             master=self.left_frame,
         )
         dish_weight_entry.pack()
@@ -254,6 +322,28 @@ class App(tk.Tk):
     def remove_dish_field(self, dish_weight_entry):
         dish_weight_entry.destroy()
         self.dish_weight_entries.remove(dish_weight_entry)
+        self.ration_totals.remove(dish_weight_entry)
+        self.schedule_live_plot()
+
+    def update_ration_totals(self, dish_weight_entry):
+        try:
+            weight = float(dish_weight_entry.weight_var.get())
+        except ValueError:
+            weight = 0
+        self.ration_totals.set(
+            dish_weight_entry, dish_weight_entry.dish_entry.get(), weight
+        )
+        self.schedule_live_plot()
+
+    def schedule_live_plot(self):
+        # one redraw per idle period, however many entries changed
+        if self.live_plot_var.get() and self._live_plot_id is None:
+            self._live_plot_id = self.after_idle(self.live_plot)
+
+    def live_plot(self):
+        self._live_plot_id = None
+        if self.live_plot_var.get():
+            self.plot_ration_nutrients(self.ration_totals.nutrients_total())
 
     def save_ration(self):
         file_path = filedialog.asksaveasfilename(
@@ -278,9 +368,10 @@ class App(tk.Tk):
 
         for dish, weight in ration_dict["Рацион"].items():
             dish_weight_entry = DishWeightEntry(
-                list(self.data.keys()),
+                self.name_index,
                 remove_callback=self.remove_dish_field,
                 disable_autocomplete=True,
+                change_callback=self.update_ration_totals,
                 master=self.left_frame,
             )
             dish_weight_entry.dish_entry.insert(0, dish)
@@ -318,8 +409,9 @@ class App(tk.Tk):
         while self.dish_weight_entries:
             dish_weight_entry = self.dish_weight_entries.pop()
             dish_weight_entry.destroy()
+            self.ration_totals.remove(dish_weight_entry)
 
-    def plot_ration_nutrients(self):
+    def plot_ration_nutrients(self, nutrients_total=None):
         gender = self.gender_var.get()
         height = self.height_var.get()
         weight = self.weight_var.get()
@@ -330,13 +422,13 @@ class App(tk.Tk):
         nutrient_ranges = calculate_nutrient_ranges(
             gender, height, weight, age, activity_multiplier, breastfeeding
         )
-        ration_dict = self.get_current_ration_dict()
-        nutrients_total = compute_data_dict(ration_dict, self.data)["Рацион"][
-            "nutrients_total"
-        ]
+        if nutrients_total is None:
+            ration_dict = self.get_current_ration_dict()
+            nutrients_total = compute_dishes(ration_dict, self.food)["Рацион"][
+                "nutrients_total"
+            ]
 
-        fig = plot_ration_nutrients(nutrient_ranges, nutrients_total, title=None)
-        self.draw_plot(fig)
+        self.draw_plot(nutrient_ranges, nutrients_total)
 
 
 if __name__ == "__main__":
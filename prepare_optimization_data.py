@@ -1,4 +1,5 @@
 from data import load_json, save_json
+from food_matrix import PIECE_UNIT, FoodMatrix, bundle_path, save_food_bundle
 
 prices = load_json("prices_corrected.json")
 food_database = load_json("food_database.json")
@@ -10,4 +11,11 @@ for key, value in prices.items():
         opt_data[key]["nutrients_in_100g"] = food_database[key]["nutrients_in_100g"]
         opt_data[key]["price"] = {}
         opt_data[key]["price"]["100g"] = prices[key]
+        # products sold by the piece keep their pack weight and pack price
+        price = food_database[key].get("price", {})
+        if "item" in price and PIECE_UNIT in price.get("unit", ""):
+            opt_data[key]["weight"] = food_database[key]["weight"]
+            opt_data[key]["price"]["item"] = price["item"]
+            opt_data[key]["price"]["unit"] = price["unit"]
 save_json("opt_data.json", opt_data)
+save_food_bundle(bundle_path("opt_data.json"), FoodMatrix.from_dict(opt_data))
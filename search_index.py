@@ -0,0 +1,118 @@
+import re
+
+import numpy as np
+
+NGRAM = 3
+_NON_WORD_RE = re.compile(r"\W")
+_NO_MATCHES = np.array([], dtype=np.int32)
+
+
+def _grams(text, n):
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+class NameSearchIndex:
+    # Substring search over a fixed list of names. Every 1..NGRAM-gram of the
+    # lowercased names maps to the sorted ids of the names containing it; a
+    # query is looked up by intersecting the postings of its grams, and
+    # longer queries are then checked against the names themselves.
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.lowered = [name.lower() for name in self.names]
+        self.lowered_array = np.array(self.lowered, dtype=str)
+        # words separated by single spaces, so " " + query finds word prefixes
+        self.words_array = np.array(
+            [" " + _NON_WORD_RE.sub(" ", name) for name in self.lowered], dtype=str
+        )
+        self.lengths = np.array([len(name) for name in self.lowered], dtype=np.int32)
+        postings = {}
+        for name_id, name in enumerate(self.lowered):
+            for n in range(1, NGRAM + 1):
+                for gram in _grams(name, n):
+                    postings.setdefault(gram, []).append(name_id)
+        self.postings = {
+            gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()
+        }
+        # (query, matches) of the last lookup, replaced as a whole so a
+        # search thread never sees a half-updated pair
+        self._last = (None, None)
+
+    def __len__(self):
+        return len(self.names)
+
+    def matches(self, query):
+        query = query.lower()
+        if not query:
+            return np.arange(len(self.names), dtype=np.int32)
+        last_query, last_matches = self._last
+        if last_query and last_query in query:
+            # the query grew: its matches are a subset of the previous ones
+            candidates = last_matches
+        else:
+            grams = _grams(query, min(len(query), NGRAM))
+            lists = sorted(
+                (self.postings.get(gram, _NO_MATCHES) for gram in grams), key=len
+            )
+            candidates = lists[0]
+            for ids in lists[1:]:
+                if len(candidates) == 0:
+                    break
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        if len(query) > NGRAM or candidates is last_matches:
+            found = np.char.find(self.lowered_array[candidates], query) >= 0
+            candidates = candidates[found]
+        self._last = (query, candidates)
+        return candidates
+
+    def fuzzy_matches(self, query, exclude=_NO_MATCHES):
+        # typo-tolerant: names sharing at least half of the query bigrams,
+        # most shared first, then closest in length
+        grams = _grams(query.lower(), 2)
+        if len(grams) < 2:
+            return _NO_MATCHES
+        shared = np.bincount(
+            np.concatenate([self.postings.get(gram, _NO_MATCHES) for gram in grams]),
+            minlength=len(self.names),
+        )
+        shared[exclude] = 0
+        candidates = np.flatnonzero(shared >= (len(grams) + 1) // 2)
+        order = np.lexsort(
+            (
+                candidates,
+                np.abs(self.lengths[candidates] - len(query)),
+                -shared[candidates],
+            )
+        )
+        return candidates[order]
+
+    def search(self, query, limit=None, fuzzy=False):
+        # exact match, then name prefix, then word prefix, then earlier and
+        # shorter matches, then catalog order; with fuzzy, near matches
+        # fill the remaining places
+        candidates = self.matches(query)
+        query = query.lower()
+        if query and len(candidates):
+            positions = np.char.find(self.lowered_array[candidates], query)
+            word_prefix = (
+                np.char.find(
+                    self.words_array[candidates], " " + _NON_WORD_RE.sub(" ", query)
+                )
+                >= 0
+            )
+            lengths = self.lengths[candidates]
+            order = np.lexsort(
+                (
+                    candidates,
+                    lengths,
+                    positions,
+                    ~word_prefix,
+                    positions != 0,
+                    (positions != 0) | (lengths != len(query)),
+                )
+            )
+            candidates = candidates[order]
+        if fuzzy and query and (limit is None or len(candidates) < limit):
+            candidates = np.concatenate(
+                [candidates, self.fuzzy_matches(query, exclude=candidates)]
+            )
+        return [self.names[name_id] for name_id in candidates[:limit].tolist()]
@@ -0,0 +1,155 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from data import load_json, save_json
+
+DROPPED_COLUMNS = [
+    "NDB_No",
+    "GmWt_1",
+    "GmWt_Desc1",
+    "GmWt_2",
+    "GmWt_Desc2",
+    "Refuse_Pct",
+]
+CACHE_VERSION = 1
+
+
+class USDANutrientStore:
+    def __init__(self, names, columns, values, integer_columns=()):
+        self.names = list(names)
+        self.columns = list(columns)
+        self.values = np.asarray(values, dtype=np.float32)
+        self.index = {name: row for row, name in enumerate(self.names)}
+        self.integer_columns = set(integer_columns)
+        self._dict_cache = {}
+
+    @classmethod
+    def from_dataframe(cls, df):
+        integer_columns = [
+            column
+            for column in df.columns
+            if np.issubdtype(df[column].dtype, np.integer)
+        ]
+        return cls(
+            df.index,
+            df.columns,
+            df.to_numpy(dtype=np.float32),
+            integer_columns=integer_columns,
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def row(self, name):
+        return self.values[self.index[name]]
+
+    def lookup(self, name):
+        if name not in self._dict_cache:
+            self._dict_cache[name] = self._row_to_dict(self.row(name))
+        return self._dict_cache[name]
+
+    def lookup_many(self, names):
+        rows = np.fromiter(
+            (self.index[name] for name in names), dtype=np.intp, count=len(names)
+        )
+        return self.values[rows]
+
+    def _row_to_dict(self, row):
+        # float32 -> shortest decimal repr, so the dict carries the values
+        # exactly as they are written in the workbook
+        values = row.astype(str).astype(float)
+        return {
+            column: int(value) if column in self.integer_columns else float(value)
+            for column, value in zip(self.columns, values)
+        }
+
+
+def read_abbrev_xlsx(xlsx_path):
+    base_df = (
+        pd.ExcelFile(xlsx_path).parse(0, index=False).drop(DROPPED_COLUMNS, axis=1)
+    )
+    base_df.set_index("Shrt_Desc", inplace=True)
+    base_df.fillna(0, inplace=True)
+    return base_df
+
+
+def _file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as source_file:
+        for chunk in iter(lambda: source_file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_paths(xlsx_path, cache_dir):
+    base_name = os.path.splitext(os.path.basename(xlsx_path))[0]
+    cache_dir = cache_dir or os.path.dirname(os.path.abspath(xlsx_path))
+    cache_prefix = os.path.join(cache_dir, base_name + ".cache")
+    return cache_prefix + ".npy", cache_prefix + ".json"
+
+
+def _cached_manifest(xlsx_path, matrix_path, manifest_path):
+    if not (os.path.exists(matrix_path) and os.path.exists(manifest_path)):
+        return None
+    manifest = load_json(manifest_path)
+    if manifest.get("version") != CACHE_VERSION:
+        return None
+
+    stat = os.stat(xlsx_path)
+    if (
+        manifest["source_mtime_ns"] == stat.st_mtime_ns
+        and manifest["source_size"] == stat.st_size
+    ):
+        return manifest
+    # mtime changed (copy, sync, touch) - trust the cache only if the
+    # content is byte-identical and remember the new mtime
+    if manifest["source_sha256"] != _file_sha256(xlsx_path):
+        return None
+    manifest["source_mtime_ns"] = stat.st_mtime_ns
+    manifest["source_size"] = stat.st_size
+    save_json(manifest_path, manifest)
+    return manifest
+
+
+def _write_cache(store, xlsx_path, matrix_path, manifest_path):
+    stat = os.stat(xlsx_path)
+    manifest = {
+        "version": CACHE_VERSION,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "source_sha256": _file_sha256(xlsx_path),
+        "columns": store.columns,
+        "integer_columns": sorted(store.integer_columns),
+        "names": store.names,
+    }
+    os.makedirs(os.path.dirname(matrix_path), exist_ok=True)
+    # np.save appends ".npy" unless the name already ends with it
+    tmp_matrix_path = matrix_path + ".tmp.npy"
+    np.save(tmp_matrix_path, store.values)
+    os.replace(tmp_matrix_path, matrix_path)
+    # the manifest is written last, so a crash leaves no valid cache
+    tmp_manifest_path = manifest_path + ".tmp"
+    save_json(tmp_manifest_path, manifest)
+    os.replace(tmp_manifest_path, manifest_path)
+
+
+def load_sr28(xlsx_path, cache_dir=None):
+    matrix_path, manifest_path = _cache_paths(xlsx_path, cache_dir)
+    manifest = _cached_manifest(xlsx_path, matrix_path, manifest_path)
+    if manifest is not None:
+        return USDANutrientStore(
+            manifest["names"],
+            manifest["columns"],
+            np.load(matrix_path, mmap_mode="r"),
+            integer_columns=manifest["integer_columns"],
+        )
+
+    store = USDANutrientStore.from_dataframe(read_abbrev_xlsx(xlsx_path))
+    _write_cache(store, xlsx_path, matrix_path, manifest_path)
+    return store
@@ -1,283 +1,33 @@
-import re
-
-import pandas as pd
-
-from data import compute_data_dict, load_json, save_json
-
-xls = pd.ExcelFile("D:/YandexDisk/food/sr28abxl/ABBREV.xlsx")
-base_df = xls.parse(0, index=False).drop(
-    ["NDB_No", "GmWt_1", "GmWt_Desc1", "GmWt_2", "GmWt_Desc2", "Refuse_Pct"], axis=1
-)
-base_df.set_index("Shrt_Desc", inplace=True)
-base_df.fillna(0, inplace=True)
-
-categories_can_be_excluded = [
-    "Готовая еда",
-    "Сладости и десерты",
-    "Супермаркет",
-    "Горячая еда",
-    "Роллы",
-    "Веганское, растительное, постное",
-    "Мясная гастрономия",
-    "Чай и кофе",
-    "Замороженные продукты + Айс",
-    "Мороженое",
-    "Хлеб и выпечка",
-    "Выпекаем сами",
-]
-
-vkusvill_dict = {
-    "CEREALS,OATS,INST,FORT,PLN,DRY": {
-        "required_words": [r"\bгеркулес\b"],
-        "optional_words": [],
-    },
-    "PEAS,GRN,SPLIT,MATURE SEEDS,RAW": {
-        "required_words": [r"\bгорох\b", r"\bколотый\b"],
-        "optional_words": [],
-    },
-    "PASTA,DRY,ENR": {"required_words": [r"\bмакарон"], "optional_words": []},
-    "WHEAT FLOUR,WHOLE-GRAIN": {
-        "required_words": [r"\bмука\b", r"\bпшеничная\b", r"\bцельнозерновая\b"],
-        "optional_words": [],
-    },
-    "WHEAT FLR,WHITE,ALL-PURPOSE,UNENR": {
-        "required_words": [r"\bмука\b", r"\bпшеничная\b"],
-        "optional_words": [],
-    },
-    "EGG,WHL,RAW,FRSH": {"required_words": [r"\bяйцо\b"], "optional_words": []},
-    "KEFIR,LOWFAT,PLN,LIFEWAY": {
-        "required_words": [r"\bкефир\b"],
-        "optional_words": [],
-    },
-    "BUCKWHEAT": {"required_words": [r"\bкрупа гречневая\b"], "optional_words": []},
-    "POTATOES,FLESH & SKN,RAW": {
-        "required_words": [r"\bкартофель\b"],
-        "optional_words": [],
-    },
-    "CARROTS,RAW": {
-        "required_words": [r"\bморковь\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "PARSLEY,FRSH": {
-        "required_words": [r"\bпетрушка\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "DILL WEED,FRSH": {
-        "required_words": [r"\bукроп\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "WATERMELON,RAW": {
-        "required_words": [r"\bарбуз\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "LETTUCE,GRN LEAF,RAW": {
-        "required_words": [r"\bсалат\b", r"\bлистовой\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "RICE,BROWN,LONG-GRAIN,RAW": {
-        "required_words": [r"\bрис\b", r"\bбурый\b"],
-        "optional_words": [],
-    },
-    "SPICES,BASIL,DRIED": {
-        "required_words": [r"\bбазилик\b", r"\bсушен\b"],
-        "optional_words": [],
-    },
-    "BASIL,FRESH": {
-        "required_words": [r"\bбазилик\b", r"\bрп\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "PEPPERS,SWT,RED,RAW": {
-        "required_words": [r"\bперец красный\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "SPINACH,RAW": {
-        "required_words": [r"\bшпинат\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "AVOCADOS,RAW,CALIFORNIA": {
-        "required_words": [r"\bавокадо\b"],
-        "optional_words": [],
-    },
-    "SPICES,OREGANO,DRIED": {"required_words": [r"\bорегано\b"], "optional_words": []},
-    "BROCCOLI,RAW": {"required_words": [r"\bброкколи\b"], "optional_words": []},
-    "BEANS,PINK,MATURE SEEDS,RAW": {
-        "required_words": [r"\bфасоль\b", r"\bкрасная\b"],
-        "optional_words": [],
-    },
-    "BEANS,WHITE,MATURE SEEDS,CND": {
-        "required_words": [r"\bфасоль\b", r"\bбелая\b"],
-        "optional_words": [],
-    },
-    "PEAS,GRN,CND,NO SALT,SOL&LIQUIDS": {
-        "required_words": [r"\bгорошек\b"],
-        "optional_words": [],
-    },
-    "CELERY,RAW": {
-        "required_words": [r"\bсельдерей\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "MILK,WHL,3.25% MILKFAT,WO/ ADDED VIT A & VITAMIN D": {
-        "required_words": [r"\bмолоко\b"],
-        "optional_words": [],
-    },
-    "RICE,WHITE,LONG-GRAIN,REG,RAW,UNENR": {
-        "required_words": [r"\bрис\b", r"\bшлифованный\b", r"\bдлиннозерный\b"],
-        "optional_words": [],
-    },
-    "WALNUTS,ENGLISH": {
-        "required_words": [r"\bгрецкий\b", r"\bорех\b"],
-        "optional_words": [],
-    },
-    "MUSHROOMS,WHITE,RAW": {"required_words": [r"\bгрибы\b"], "optional_words": []},
-    "ONIONS,RAW": {
-        "required_words": [r"\bлук\b", r"\bрепчатый\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "ONIONS,YOUNG GRN,TOPS ONLY": {
-        "required_words": [r"\bлук\b", r"\bзеленый\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "BEANS,SNAP,GRN,FRZ,ALL STYLES,UNPREP": {
-        "required_words": [r"\bфасоль\b", r"\bстручковая\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "ARUGULA,RAW": {
-        "required_words": [r"\bруккола\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "ORANGES,RAW,ALL COMM VAR": {
-        "required_words": [r"\bапельсины\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "BANANAS,RAW": {"required_words": [r"\bбананы\b"], "optional_words": []},
-    "APPLES,RAW,WITH SKIN": {
-        "required_words": [r"\bяблоко\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "GRAPEFRUIT,RAW,PINK&RED&WHITE,ALL AREAS": {
-        "required_words": [r"\bгрейпфрут\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "CHEESE,COTTAGE,LOWFAT,1% MILKFAT": {
-        "required_words": [r"\bтворог\b"],
-        "optional_words": [],
-    },
-    "ALMONDS": {"required_words": [r"\bминдаль\b"], "optional_words": []},
-    "CHICKEN,BROILER OR FRYERS,BRST,SKINLESS,BNLESS,MEAT ONLY,RAW": {
-        "required_words": [r"\bфиле\b", r"\bгрудки\b", r"\bцыпленка\b"],
-        "optional_words": [],
-    },
-    "CUCUMBER,WITH PEEL,RAW": {
-        "required_words": [r"\bогурцы\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "PEARS,RAW": {
-        "required_words": [r"\bгруша\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "THYME,FRSH": {
-        "required_words": [r"\bтимьян\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "SALMON,ATLANTIC,FARMED,RAW": {
-        "required_words": [r"\bсемга\b", r"\bстейк\b"],
-        "optional_words": [],
-    },
-    "FISH,COD,PACIFIC,CKD,DRY HEAT (MAYBE PREVIOUSLY FROZEN)": {
-        "required_words": [r"\треска\b"],
-        "optional_words": [],
-    },
-    "CREAM,FLUID,HALF AND HALF": {
-        "required_words": [r"\bсливки\b"],
-        "optional_words": [],
-    },
-    "NUTS,PINE NUTS,DRIED": {
-        "required_words": [r"\bкедровый\b", r"\bорех\b"],
-        "optional_words": [],
-    },
-    "YOGURT,GREEK,PLN,WHL MILK": {
-        "required_words": [r"\bйогурт\b", r"\bгреческий\b"],
-        "optional_words": [],
-    },
-    "STRAWBERRIES,RAW": {
-        "required_words": [r"\bклубника\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "BLACKBERRIES,RAW": {
-        "required_words": [r"\bежевика\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "RASPBERRIES,RAW": {
-        "required_words": [r"\bмалина\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "GRAPES,RED OR GRN (EURO TYPE,SUCH AS THOMPSON SEEDLESS),RAW": {
-        "required_words": [r"\bвиноград\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "BLUEBERRIES,RAW": {
-        "required_words": [r"\bголубика\b"],
-        "optional_words": [],
-        "vegetable_fruit": True,
-    },
-    "OIL,SUNFLOWER,HI OLEIC (70% & OVER)": {
-        "required_words": [r"\bмасло\b", r"\bподсолнечное\b"],
-        "optional_words": [],
-    },
-    "OIL,OLIVE,SALAD OR COOKING": {
-        "required_words": [r"\bмасло\b", r"\bоливковое\b"],
-        "optional_words": [],
-    },
-}
-
-
-def product_nutrients(name):
-    # line = df.loc[df['Shrt_Desc'] == name]
-    # return line.reset_index(drop=True).drop('Shrt_Desc', axis=1).to_dict('index')[0]
-    return base_df[base_df.index == name].to_dict("index")[name]
-
-
-def vkusvill_nutrients(name):
-    name_lower = name.lower()
-    for engl, dict2 in vkusvill_dict.items():
-        required_fits = all(
-            re.search(word, name_lower) for word in dict2["required_words"]
-        )
-        optional_fits = any(
-            re.search(word, name_lower) for word in dict2["optional_words"]
-        )
-        if required_fits and (not dict2["optional_words"] or optional_fits):
-            return {"base_nutrients": product_nutrients(engl)}
-    return {}
-
-
-data = load_json("D:/YandexDisk/food/code/vkusvill.json")
-prices_dict = {}
-
-for good, params in data.items():
+import argparse
+import hashlib
+import json
+import os
+
+from data import JsonObjectWriter, iter_json, load_json, save_json
+from dishes import DishResolver, dish_graph, dish_levels
+from food_matrix import FoodMatrixBuilder, bundle_path, save_food_bundle
+from matcher import NameMatcher
+from usda_store import load_sr28
+from vkusvill_mapping import categories_can_be_excluded, vkusvill_dict
+
+SR28_PATH = "D:/YandexDisk/food/sr28abxl/ABBREV.xlsx"
+VKUSVILL_PATH = "D:/YandexDisk/food/code/vkusvill.json"
+DISHES_PATH = "D:/YandexDisk/food/code/dishes.json"
+DATABASE_PATH = "D:/YandexDisk/food/code/food_database.json"
+PRICES_PATH = "D:/YandexDisk/food/code/prices.json"
+BUILD_STATE_PATH = "D:/YandexDisk/food/code/food_database.state.json"
+
+vkusvill_matcher = NameMatcher(vkusvill_dict)
+
+
+def match_rule(good, params):
+    if params["category"] in categories_can_be_excluded:
+        return None
+    return vkusvill_matcher.match(good)
+
+
+def process_product(params, base_nutrients):
+    price_100g = None
     nutrients_in_100g = params["nutrients_in_100g"]
 
     if (
@@ -299,12 +49,10 @@ for good, params in data.items():
                 2,
             )
 
-    if params["category"] not in categories_can_be_excluded:
-        base_params = vkusvill_nutrients(good)
-        if "base_nutrients" in base_params:
-            for key, value in base_params["base_nutrients"].items():
-                if key not in nutrients_in_100g:
-                    nutrients_in_100g[key] = value
+    if base_nutrients is not None:
+        for key, value in base_nutrients.items():
+            if key not in nutrients_in_100g:
+                nutrients_in_100g[key] = value
 
     vegetables_fruits = 0
     if params["category"] == "Овощи, фрукты, ягоды, зелень":
@@ -329,9 +77,8 @@ for good, params in data.items():
                 price["kg"] = price["value"]
                 price["100g"] = price["value"] / 10
 
-            if "100g" in price and params["category"] not in categories_can_be_excluded:
-                if "base_nutrients" in base_params:
-                    prices_dict[good] = price["100g"]
+            if "100g" in price and base_nutrients is not None:
+                price_100g = price["100g"]
 
     if "Energ_Kcal" in params["nutrients_in_100g"]:
         kcal = params["nutrients_in_100g"]["Energ_Kcal"]
@@ -350,9 +97,148 @@ for good, params in data.items():
                 params["nutrients_in_100g"][nutrient] / price, 5
             )
 
-dishes = load_json("D:/YandexDisk/food/code/dishes.json")
-
-data.update(compute_data_dict(dishes, data))
-
-save_json("D:/YandexDisk/food/code/food_database.json", data)
-save_json("D:/YandexDisk/food/code/prices.json", prices_dict)
+    return price_100g
+
+
+def _fingerprint(obj):
+    serialized = json.dumps(obj, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+
+class DatabaseBuild:
+    # Yields the food database record by record, so a full build only keeps
+    # the products that dishes are made of in memory. Prices, fingerprints
+    # and reuse counters are collected along the way.
+    def __init__(self, usda_store, previous=None):
+        if previous is None:
+            previous = {"database": {}, "prices": {}, "state": {}}
+        self.usda_store = usda_store
+        self.previous = previous
+        self.prices = {}
+        self.state = {"products": {}, "dishes": {}}
+        self.stats = {
+            "products": 0,
+            "products_reused": 0,
+            "dishes": 0,
+            "dishes_reused": 0,
+        }
+
+    def records(self, products, dishes):
+        previous_database = self.previous["database"]
+        previous_products = self.previous["state"].get("products", {})
+        previous_dishes = self.previous["state"].get("dishes", {})
+        ingredients = {item for composition in dishes.values() for item in composition}
+        ingredient_records = {}
+
+        for good, params in products:
+            rule = match_rule(good, params)
+            base_nutrients = self.usda_store.lookup(rule) if rule is not None else None
+            fingerprint = _fingerprint([params, rule, base_nutrients])
+            self.state["products"][good] = fingerprint
+            self.stats["products"] += 1
+
+            if (
+                previous_products.get(good) == fingerprint
+                and good in previous_database
+                and good not in previous_dishes
+            ):
+                params = previous_database[good]
+                if good in self.previous["prices"]:
+                    self.prices[good] = self.previous["prices"][good]
+                self.stats["products_reused"] += 1
+            else:
+                price_100g = process_product(params, base_nutrients)
+                if price_100g is not None:
+                    self.prices[good] = price_100g
+
+            if good in ingredients:
+                ingredient_records[good] = params
+            # a dish with the same name replaces the product
+            if good not in dishes:
+                yield good, params
+
+        # nested dishes are fingerprinted after the dishes they contain, so a
+        # change anywhere below a dish invalidates it
+        resolved = {}
+        for level in dish_levels(dish_graph(dishes)):
+            for dish in level:
+                composition = dishes[dish]
+                fingerprint = _fingerprint(
+                    [
+                        composition,
+                        {
+                            item: self.state["dishes"].get(item)
+                            or self.state["products"].get(item)
+                            for item in composition
+                        },
+                    ]
+                )
+                self.state["dishes"][dish] = fingerprint
+                self.stats["dishes"] += 1
+                if (
+                    previous_dishes.get(dish) == fingerprint
+                    and dish in previous_database
+                ):
+                    self.stats["dishes_reused"] += 1
+                    resolved[dish] = previous_database[dish]
+
+        dish_records = DishResolver(dishes, ingredient_records, resolved).resolve()
+        for dish in dishes:
+            yield dish, dish_records[dish]
+
+
+def build_database(data, dishes, usda_store, previous=None):
+    build = DatabaseBuild(usda_store, previous)
+    database = dict(build.records(data.items(), dishes))
+    return database, build.prices, build.state, build.stats
+
+
+def load_previous_build():
+    paths = [DATABASE_PATH, PRICES_PATH, BUILD_STATE_PATH]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    return {
+        "database": load_json(DATABASE_PATH),
+        "prices": load_json(PRICES_PATH),
+        "state": load_json(BUILD_STATE_PATH),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build food_database.json")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="reuse records of products whose input did not change",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="write food_database.json without indentation",
+    )
+    args = parser.parse_args()
+
+    usda_store = load_sr28(SR28_PATH)
+    dishes = load_json(DISHES_PATH)
+    previous = load_previous_build() if args.incremental else None
+
+    build = DatabaseBuild(usda_store, previous)
+    food_builder = FoodMatrixBuilder()
+    with JsonObjectWriter(DATABASE_PATH, compact=args.compact) as writer:
+        for name, record in build.records(iter_json(VKUSVILL_PATH), dishes):
+            writer.write(name, record)
+            food_builder.add(name, record)
+    save_food_bundle(bundle_path(DATABASE_PATH), food_builder.build())
+
+    stats = build.stats
+    print(
+        f"products reused: {stats['products_reused']}/{stats['products']}, "
+        f"dishes reused: {stats['dishes_reused']}/{stats['dishes']}"
+    )
+
+    save_json(PRICES_PATH, build.prices)
+    save_json(BUILD_STATE_PATH, build.state, compact=True)
+
+
+if __name__ == "__main__":
+    main()
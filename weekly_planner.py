@@ -0,0 +1,305 @@
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+
+# daily cap (100 g units, i.e. 1 kg a day) of products without a max_weight
+# in the exact (MILP) plan, which needs a finite cap for every product
+DEFAULT_DAILY_CAP = 10
+
+
+def daily_caps(day, daily_cap=None):
+    # max_weight (and daily_cap, if given), tightened by what the day's
+    # constraints allow anyway: with non-negative amounts, a row
+    # a @ x <= b whose coefficients are all >= 0 bounds every x_j by
+    # b / a_j. These implied bounds do not change the problem, they only
+    # keep the MILP relaxation close.
+    caps = np.where(np.isfinite(day["bounds"][:, 1]), day["bounds"][:, 1], np.inf)
+    if daily_cap is not None:
+        caps = np.fmin(caps, daily_cap)
+
+    A = sparse.vstack([day["A_ub"], day["A_eq"]], format="csr")
+    b = np.concatenate([day["b_ub"], day["b_eq"]])
+    non_negative = np.asarray(A.minimum(0).getnnz(axis=1) == 0)
+    rows = A[non_negative].tocoo()
+    positive = rows.data > 0
+    np.minimum.at(
+        caps,
+        rows.col[positive],
+        b[non_negative][rows.row[positive]] / rows.data[positive],
+    )
+    return np.maximum(caps, 0)
+
+
+def build_weekly_lp(
+    model,
+    nutrient_ranges,
+    n_days=7,
+    max_repeats=None,
+    prices=None,
+    max_weights=None,
+    daily_cap=None,
+):
+    # variables: the single-day vector repeated for every day, so the
+    # constraint matrices are block diagonal copies of the single-day ones.
+    # Without daily_cap every day is the same problem as DietModel.solve.
+    day = model.build_lp(nutrient_ranges, prices=prices, max_weights=max_weights)
+    n_products = len(model.food)
+    caps = daily_caps(day, daily_cap)
+
+    A_ub = sparse.block_diag([day["A_ub"]] * n_days, format="csr")
+    b_ub = np.tile(day["b_ub"], n_days)
+
+    if max_repeats is not None and max_repeats < n_days:
+        # LP relaxation of the repeat limit: over the whole period a product
+        # is bought for at most max_repeats full daily portions. This caps
+        # amounts, not days; repair_weekly_plan and build_weekly_milp count
+        # the days.
+        limited = np.flatnonzero(np.isfinite(caps))
+        over_days = sparse.kron(
+            np.ones((1, n_days)),
+            sparse.identity(n_products, format="csr")[limited],
+            format="csr",
+        )
+        A_ub = sparse.vstack([A_ub, over_days], format="csr")
+        b_ub = np.concatenate([b_ub, max_repeats * caps[limited]])
+
+    return {
+        "c": np.tile(day["c"], n_days),
+        "A_ub": A_ub,
+        "b_ub": b_ub,
+        "A_eq": sparse.block_diag([day["A_eq"]] * n_days, format="csr"),
+        "b_eq": np.tile(day["b_eq"], n_days),
+        "bounds": np.column_stack(
+            [np.zeros(n_products * n_days), np.tile(caps, n_days)]
+        ),
+    }
+
+
+def build_weekly_milp(
+    model,
+    nutrient_ranges,
+    n_days=7,
+    max_repeats=1,
+    prices=None,
+    max_weights=None,
+    daily_cap=DEFAULT_DAILY_CAP,
+):
+    # amounts of every product for every day, followed by one binary per
+    # product and day telling whether the product is eaten that day. The
+    # binaries need a finite cap (big M) on every amount: daily_cap is a
+    # real restriction of the plan, not just a solver bound. Products left
+    # without any cap supply nothing and are fixed to 0.
+    lp = build_weekly_lp(
+        model,
+        nutrient_ranges,
+        n_days,
+        prices=prices,
+        max_weights=max_weights,
+        daily_cap=daily_cap,
+    )
+    n_products = len(model.food)
+    n_amounts = n_products * n_days
+
+    caps = np.where(np.isfinite(lp["bounds"][:, 1]), lp["bounds"][:, 1], 0)
+    used_link = sparse.hstack(
+        [sparse.identity(n_amounts), -sparse.diags(caps)], format="csr"
+    )
+    use_days = sparse.hstack(
+        [
+            sparse.csr_matrix((n_products, n_amounts)),
+            sparse.kron(np.ones((1, n_days)), sparse.identity(n_products)),
+        ],
+        format="csr",
+    )
+    no_indicators = sparse.csr_matrix((lp["A_ub"].shape[0], n_amounts))
+    A = sparse.vstack(
+        [
+            sparse.hstack([lp["A_ub"], no_indicators]),
+            sparse.hstack([lp["A_eq"], sparse.csr_matrix((n_days, n_amounts))]),
+            used_link,
+            use_days,
+        ],
+        format="csr",
+    )
+    constraint_lb = np.concatenate(
+        [
+            np.full(len(lp["b_ub"]), -np.inf),
+            lp["b_eq"],
+            np.full(n_amounts + n_products, -np.inf),
+        ]
+    )
+    constraint_ub = np.concatenate(
+        [lp["b_ub"], lp["b_eq"], np.zeros(n_amounts), np.full(n_products, max_repeats)]
+    )
+
+    return {
+        "c": np.concatenate([lp["c"], np.zeros(n_amounts)]),
+        "integrality": np.concatenate([np.zeros(n_amounts), np.ones(n_amounts)]),
+        "bounds": Bounds(
+            np.zeros(2 * n_amounts), np.concatenate([caps, np.ones(n_amounts)])
+        ),
+        "constraints": LinearConstraint(A, constraint_lb, constraint_ub),
+    }
+
+
+def repair_weekly_plan(lp, amounts, max_repeats, max_rounds=50):
+    # Turns a plan that eats some products on more than max_repeats days
+    # (e.g. the LP relaxation) into one that does not: every such product
+    # keeps only the max_repeats days it is eaten most on, and the LP is
+    # re-solved with the other days fixed to 0, until no product is over
+    # the limit. Returns the final linprog result, or None if a re-solve
+    # is infeasible.
+    n_days, n_products = amounts.shape
+    allowed = np.ones((n_days, n_products), dtype=bool)
+    bounds = lp["bounds"].copy()
+    result = None
+    for _ in range(max_rounds):
+        over = np.flatnonzero((amounts * 100 > 1e-6).sum(axis=0) > max_repeats)
+        if not len(over):
+            return result
+        top_days = np.argsort(-amounts[:, over], axis=0, kind="stable")
+        keep = np.zeros((n_days, len(over)), dtype=bool)
+        np.put_along_axis(keep, top_days[:max_repeats], True, axis=0)
+        allowed[:, over] &= keep
+        bounds[:, 1] = np.where(allowed.ravel(), lp["bounds"][:, 1], 0)
+        result = linprog(**dict(lp, bounds=bounds), method="highs")
+        if not result.success:
+            return None
+        amounts = result.x.reshape(n_days, n_products)
+    return None
+
+
+def solve_weekly_plan(
+    model,
+    nutrient_ranges,
+    n_days=7,
+    max_repeats=None,
+    method="repair",
+    time_limit=60,
+    mip_rel_gap=1e-3,
+    prices=None,
+    max_weights=None,
+    daily_cap=None,
+):
+    # max_repeats: on how many of the n_days a product may be eaten (None:
+    # no limit). Methods for a limited plan:
+    #   "repair" - the LP relaxation, repaired by repair_weekly_plan; fast,
+    #              not proven optimal
+    #   "lp"     - only the LP relaxation, which limits the total amount
+    #              of each product, not its days
+    #   "milp"   - exact, under time_limit and with daily_cap (default
+    #              DEFAULT_DAILY_CAP) as a real cap; on timeout the better
+    #              of its incumbent and the repaired LP plan is returned
+    # status: "optimal", "heuristic" (repaired plan), "time_limit",
+    # "infeasible" (no plan meets the daily windows) or "repair_failed";
+    # lower_bound is the LP relaxation cost. days, purchase and cost are
+    # None when there is no plan.
+    n_products = len(model.food)
+    limited = max_repeats is not None and max_repeats < n_days
+    if method == "milp" and limited and daily_cap is None:
+        daily_cap = DEFAULT_DAILY_CAP
+
+    lp = build_weekly_lp(
+        model,
+        nutrient_ranges,
+        n_days,
+        max_repeats=max_repeats,
+        prices=prices,
+        max_weights=max_weights,
+        daily_cap=daily_cap,
+    )
+    relaxation = linprog(**lp, method="highs")
+    if not relaxation.success:
+        return _weekly_plan(model, "infeasible", "lp", n_days)
+    if not limited or method == "lp":
+        return _weekly_plan(
+            model, "optimal", "lp", n_days, relaxation.x, relaxation.fun
+        )
+    relaxed_amounts = relaxation.x.reshape(n_days, n_products)
+
+    if method == "repair":
+        repaired = repair_weekly_plan(lp, relaxed_amounts, max_repeats)
+        if repaired is None:
+            return _weekly_plan(
+                model, "repair_failed", "lp-repair", n_days, bound=relaxation.fun
+            )
+        return _weekly_plan(
+            model,
+            "heuristic",
+            "lp-repair",
+            n_days,
+            repaired.x,
+            repaired.fun,
+            relaxation.fun,
+        )
+    if method != "milp":
+        raise ValueError("Invalid method specified. Use 'repair', 'lp' or 'milp'.")
+
+    result = milp(
+        **build_weekly_milp(
+            model,
+            nutrient_ranges,
+            n_days,
+            max_repeats=max_repeats,
+            prices=prices,
+            max_weights=max_weights,
+            daily_cap=daily_cap,
+        ),
+        options={"time_limit": time_limit, "mip_rel_gap": mip_rel_gap},
+    )
+    if result.status == 0:
+        return _weekly_plan(
+            model,
+            "optimal",
+            "milp",
+            n_days,
+            result.x[: n_products * n_days],
+            result.fun,
+            relaxation.fun,
+        )
+    if result.status == 2:
+        return _weekly_plan(model, "infeasible", "milp", n_days)
+
+    # time limit: repair the LP relaxation and keep the cheaper plan
+    repaired = repair_weekly_plan(lp, relaxed_amounts, max_repeats)
+    if result.x is not None and (repaired is None or result.fun < repaired.fun):
+        return _weekly_plan(
+            model,
+            "time_limit",
+            "milp-incumbent",
+            n_days,
+            result.x[: n_products * n_days],
+            result.fun,
+            relaxation.fun,
+        )
+    if repaired is None:
+        return _weekly_plan(model, "time_limit", "milp", n_days, bound=relaxation.fun)
+    return _weekly_plan(
+        model,
+        "time_limit",
+        "lp-repair",
+        n_days,
+        repaired.x,
+        repaired.fun,
+        relaxation.fun,
+    )
+
+
+def _weekly_plan(model, status, method, n_days, x=None, cost=None, bound=None):
+    plan = {
+        "status": status,
+        "method": method,
+        "days": None,
+        "purchase": None,
+        "cost": None,
+        "lower_bound": None if bound is None else float(bound),
+    }
+    if x is None:
+        return plan
+    amounts = x.reshape(n_days, len(model.food))
+    plan["days"] = [model.diet_from_weights(day_amounts) for day_amounts in amounts]
+    plan["purchase"] = model.diet_from_weights(amounts.sum(axis=0))
+    plan["cost"] = float(cost)
+    if bound is None:
+        plan["lower_bound"] = plan["cost"]
+    return plan